@@ -0,0 +1,354 @@
+# Analytics HTTP API: prices, returns, CAPM beta/alpha, indicators and forecasts
+# without rendering a Streamlit page. Responses are JSON, or Arrow IPC with format=arrow.
+#
+#   python analytics_api.py --port 8600
+#   curl 'localhost:8600/beta?tickers=AAPL,MSFT&years=1'
+#   curl 'localhost:8600/prices?ticker=AAPL&format=arrow' > aapl.arrow
+#
+# Endpoints (all GET):
+#   /prices?ticker=AAPL&start=2024-01-01&end=2024-12-31   OHLCV history
+#   /returns?tickers=AAPL,MSFT&years=1                     daily returns in %, as on the CAPM Return page
+#   /beta?tickers=AAPL,MSFT&years=1                        beta and alpha against the market
+#   /indicators?ticker=AAPL                                RSI, MACD, SMA 50 and volatility
+#   /forecast?ticker=AAPL&engine=arima                     30-day forecast and its RMSE
+#   /health, /stats
+#
+# Data fetches run in threads and are gathered concurrently; model fits run on a process
+# pool. Responses are cached for TRADING_APP_API_TTL seconds, and identical requests that
+# arrive while one is being computed wait for that result instead of computing it again.
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+import pandas as pd
+
+from pages.utils import price_panel
+from pages.utils.price_panel import PricePanel
+from pages.utils.data_provider import get_provider
+from pages.utils.fit_service import FIT_WORKERS, prepare_stage, evaluate_stage, forecast_stage
+from pages.utils.model_train import ENGINES
+from pages.utils.precompute import MARKET_TICKER, load_precomputed, is_current, indicator_snapshot
+
+# Seconds a response stays cached, and how many responses are kept
+CACHE_TTL = float(os.environ.get('TRADING_APP_API_TTL', 60))
+CACHE_ENTRIES = 256
+
+# Longest request head accepted, in bytes
+MAX_HEAD = 16 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+# Raised by handlers to answer with an error status
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# TTL cache of encoded responses with coalescing of concurrent identical requests
+class ResponseCache:
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_compute(self, key, compute):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if key in self.in_flight:
+            self.coalesced += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            response = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+        future.set_result(response)
+        self.entries[key] = (time.monotonic() + self.ttl, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return response
+
+    def stats(self):
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': (self.hits + self.coalesced) / requests if requests else 0.0,
+        }
+
+def _param(params, name, default=None):
+    value = params.get(name, default)
+    if value is None:
+        raise ApiError(400, f"missing query parameter '{name}'")
+    return value
+
+def _tickers(params):
+    tickers = [ticker.strip().upper() for ticker in _param(params, 'tickers').split(',') if ticker.strip()]
+    if not tickers:
+        raise ApiError(400, "'tickers' must list at least one ticker")
+    return tickers
+
+# Analysis window from start/end dates, or the last `years` years (default 1) like the CAPM pages
+def _window(params):
+    try:
+        end = datetime.date.fromisoformat(params['end']) if 'end' in params else datetime.date.today()
+        if 'start' in params:
+            start = datetime.date.fromisoformat(params['start'])
+        else:
+            years = int(params.get('years', 1))
+            # DateOffset clamps 29 February to the 28th in non-leap years
+            start = (pd.Timestamp(end) - pd.DateOffset(years=years)).date()
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    return start, end
+
+def _close(frame, ticker):
+    if frame.empty:
+        raise ApiError(404, f"no price data for {ticker}")
+    close = frame['Close']
+    return close.iloc[:, 0] if isinstance(close, pd.DataFrame) else close
+
+# Download several tickers concurrently
+async def fetch_frames(tickers, start, end):
+    provider = get_provider()
+    frames = await asyncio.gather(*(
+        asyncio.to_thread(provider.download, ticker, start=start, end=end) for ticker in tickers
+    ))
+    return dict(zip(tickers, frames))
+
+# Price panel of the tickers plus the market column, aligned on common dates as on CAPM_Return
+async def fetch_panel(tickers, market, start, end):
+    frames = await fetch_frames(list(dict.fromkeys(tickers + [market])), start, end)
+    closes = pd.concat({ticker: _close(frames[ticker], ticker) for ticker in frames}, axis=1, join='inner')
+    closes = closes[tickers + [market]].reset_index()
+    closes.columns = ['Date'] + tickers + [market]
+    return PricePanel.from_frame(closes)
+
+async def prices_endpoint(app, params):
+    ticker = _param(params, 'ticker').upper()
+    start, end = _window(params)
+    frame = (await fetch_frames([ticker], start, end))[ticker]
+    if frame.empty:
+        raise ApiError(404, f"no price data for {ticker}")
+    if isinstance(frame.columns, pd.MultiIndex):
+        frame = frame.droplevel(1, axis=1)
+    return frame, {'ticker': ticker}
+
+async def returns_endpoint(app, params):
+    market = params.get('market', MARKET_TICKER).upper()
+    start, end = _window(params)
+    panel = await fetch_panel(_tickers(params), market, start, end)
+    returns = await asyncio.to_thread(price_panel.daily_return, panel)
+    return returns.to_frame(), {'market': market, 'unit': 'percent'}
+
+async def beta_endpoint(app, params):
+    tickers = _tickers(params)
+    market = params.get('market', MARKET_TICKER).upper()
+    start, end = _window(params)
+    panel = await fetch_panel(tickers, market, start, end)
+    returns = await asyncio.to_thread(price_panel.daily_return, panel)
+    rows = {ticker: price_panel.calculate_beta(returns, ticker, market) for ticker in tickers}
+    table = pd.DataFrame.from_dict(rows, orient='index', columns=['beta', 'alpha'])
+    table.index.name = 'ticker'
+    return table, {'market': market, 'start': start.isoformat(), 'end': end.isoformat()}
+
+async def indicators_endpoint(app, params):
+    ticker = _param(params, 'ticker').upper()
+    payload = load_precomputed(ticker)
+    if payload is not None and 'indicators' in payload and is_current(payload):
+        snapshot = payload['indicators']
+    else:
+        history = await asyncio.to_thread(get_provider().history, ticker, period='1y')
+        if history.empty:
+            raise ApiError(404, f"no price data for {ticker}")
+        snapshot = await asyncio.to_thread(indicator_snapshot, history)
+    return pd.DataFrame([snapshot], index=pd.Index([ticker], name='ticker')), {'ticker': ticker}
+
+async def forecast_endpoint(app, params):
+    ticker = _param(params, 'ticker').upper()
+    engine = params.get('engine', 'arima').lower()
+    if engine not in ENGINES:
+        raise ApiError(400, f"engine must be one of {', '.join(ENGINES)}")
+    start, end = datetime.date(2024, 1, 1), datetime.date.today() + datetime.timedelta(days=1)
+    close_price = (await fetch_frames([ticker], start, end))[ticker][['Close']]
+    if close_price.empty:
+        raise ApiError(404, f"no price data for {ticker}")
+
+    # A nightly precomputed forecast for this exact bar is served without refitting
+    payload = load_precomputed(ticker)
+    result = payload.get('forecast') if payload and engine == 'arima' else None
+    if result is None or result['as_of'] != close_price.index[-1]:
+        loop = asyncio.get_running_loop()
+        _, differencing_order, scaled_data, scaler = await loop.run_in_executor(app.pool, prepare_stage, close_price)
+        rmse, forecast = await asyncio.gather(
+            loop.run_in_executor(app.pool, evaluate_stage, scaled_data, differencing_order, engine),
+            loop.run_in_executor(app.pool, forecast_stage, scaled_data, differencing_order, scaler, engine),
+        )
+        result = {'rmse': rmse, 'forecast': forecast, 'as_of': close_price.index[-1]}
+    forecast = result['forecast'].rename_axis('Date')
+    return forecast, {'ticker': ticker, 'engine': engine, 'rmse': float(result['rmse']),
+                      'as_of': pd.Timestamp(result['as_of']).isoformat()}
+
+ENDPOINTS = {
+    '/prices': prices_endpoint,
+    '/returns': returns_endpoint,
+    '/beta': beta_endpoint,
+    '/indicators': indicators_endpoint,
+    '/forecast': forecast_endpoint,
+}
+
+def _json_body(document):
+    return json.dumps(document, default=str).encode()
+
+# Encode a (table, metadata) result as JSON or as an Arrow IPC stream with the metadata in the schema
+def encode(table, meta, fmt):
+    if fmt == 'arrow':
+        import pyarrow as pa
+        arrow_table = pa.Table.from_pandas(table)
+        arrow_table = arrow_table.replace_schema_metadata(
+            {**(arrow_table.schema.metadata or {}), b'meta': _json_body(meta)})
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+        return 'application/vnd.apache.arrow.stream', sink.getvalue()
+    if fmt != 'json':
+        raise ApiError(400, "format must be 'json' or 'arrow'")
+    data = json.loads(table.to_json(orient='split', date_format='iso'))
+    return 'application/json', _json_body({'meta': meta, 'data': data})
+
+class AnalyticsApp:
+    def __init__(self, workers=FIT_WORKERS, cache=None):
+        # spawn keeps the workers independent of the event loop's threads
+        self.pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        self.cache = cache or ResponseCache()
+        self.started = time.time()
+        self.requests = 0
+
+    # Route one request; returns (status, content type, body)
+    async def respond(self, method, target):
+        self.requests += 1
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        try:
+            if method != 'GET':
+                raise ApiError(405, 'only GET is supported')
+            if url.path == '/health':
+                return 200, 'application/json', _json_body({'status': 'ok'})
+            if url.path == '/stats':
+                return 200, 'application/json', _json_body({
+                    'uptime_s': round(time.time() - self.started, 1),
+                    'requests': self.requests,
+                    'cache': self.cache.stats(),
+                })
+            handler = ENDPOINTS.get(url.path)
+            if handler is None:
+                raise ApiError(404, f"unknown endpoint {url.path}")
+            fmt = params.pop('format', 'json')
+            key = (url.path, fmt, tuple(sorted(params.items())))
+
+            async def compute():
+                table, meta = await handler(self, params)
+                return encode(table, meta, fmt)
+
+            content_type, body = await self.cache.get_or_compute(key, compute)
+            return 200, content_type, body
+        except ApiError as e:
+            return e.status, 'application/json', _json_body({'error': str(e)})
+        except Exception as e:
+            return 500, 'application/json', _json_body({'error': f'{type(e).__name__}: {e}'})
+
+    # Serve HTTP/1.1 requests on one connection until the client closes it
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # Without a usable length the body cannot be skipped, so answer and close
+                    status, content_type = 400, 'application/json'
+                    body = _json_body({'error': 'invalid Content-Length header'})
+                    keep_alive = False
+                else:
+                    if length:
+                        await reader.readexactly(length)
+                    status, content_type, body = await self.respond(method, target)
+                    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write((
+                    f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+                ).encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEAD)
+        print(f"Analytics API listening on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description='Analytics HTTP API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--workers', type=int, default=FIT_WORKERS, help='processes used for forecast fits')
+    args = parser.parse_args()
+    app = AnalyticsApp(args.workers)
+    # Stop on SIGTERM the same way as on Ctrl-C, so the fit workers are shut down too
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(app.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.pool.shutdown(cancel_futures=True)
+
+if __name__ == '__main__':
+    main()
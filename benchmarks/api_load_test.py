@@ -0,0 +1,149 @@
+# Concurrent load test for the analytics API.
+#
+# Starts analytics_api.py against the replay data provider (unless --url points at a
+# running server) and drives it with asyncio clients on keep-alive connections. Each
+# client cycles through a mix of endpoints over the fixture tickers. The report gives
+# latency percentiles and throughput per endpoint, plus the server's cache statistics.
+#
+#   python benchmarks/make_fixtures.py
+#   python benchmarks/api_load_test.py --clients 32 --requests 50
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from harness import ROOT, write_results
+from pages.utils.data_provider import FIXTURES_DIR
+
+# Request templates; {ticker} and {tickers} are filled from the fixture tickers
+MIX = {
+    'prices': '/prices?ticker={ticker}',
+    'returns': '/returns?tickers={tickers}',
+    'beta': '/beta?tickers={tickers}',
+    'indicators': '/indicators?ticker={ticker}',
+    'forecast': '/forecast?ticker={ticker}&engine=holt',
+}
+
+def fixture_tickers(fixture_dir):
+    return sorted(name for name in os.listdir(fixture_dir) if not name.startswith('^'))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# One GET on an open keep-alive connection; returns (status, body)
+async def get(reader, writer, host, target):
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = next(int(line.split(':', 1)[1]) for line in lines[1:] if line.lower().startswith('content-length'))
+    return status, await reader.readexactly(length)
+
+async def client(host, port, targets, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for name, target in targets:
+            start = time.perf_counter()
+            status, _ = await get(reader, writer, host, target)
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+            if status != 200:
+                errors[name] = errors.get(name, 0) + 1
+    finally:
+        writer.close()
+
+async def wait_until_up(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f'analytics API did not start on {host}:{port}')
+
+async def run(args, host, port):
+    await wait_until_up(host, port, args.startup_timeout)
+    tickers = fixture_tickers(args.fixtures)
+    endpoints = args.endpoints.split(',')
+    plans = []
+    for c in range(args.clients):
+        targets = []
+        for r in range(args.requests):
+            name = endpoints[(c + r) % len(endpoints)]
+            ticker = tickers[(c * 7 + r) % len(tickers)]
+            group = ','.join(tickers[(c + r) % len(tickers):][:3] or tickers[:3])
+            targets.append((name, MIX[name].format(ticker=ticker, tickers=group)))
+        plans.append(targets)
+
+    latencies, errors = {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, targets, latencies, errors) for targets in plans))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, body = await get(reader, writer, host, '/stats')
+    writer.close()
+    return latencies, errors, elapsed, json.loads(body)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the analytics API')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent connections')
+    parser.add_argument('--requests', type=int, default=25, help='requests per client')
+    parser.add_argument('--endpoints', default=','.join(MIX), help='comma-separated endpoints to exercise')
+    parser.add_argument('--url', default=None, help='test a running server instead of starting one')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--workers', type=int, default=2, help='fit processes of the started server')
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        env = dict(os.environ, TRADING_APP_DATA_PROVIDER='replay', TRADING_APP_FIXTURES=args.fixtures)
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'analytics_api.py'), '--port', str(port), '--workers', str(args.workers)],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        )
+    try:
+        latencies, errors, elapsed, stats = asyncio.run(run(args, host, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    cases = {}
+    total = sum(len(values) for values in latencies.values())
+    for name, values in sorted(latencies.items()):
+        cases[name] = {
+            'requests': len(values),
+            'errors': errors.get(name, 0),
+            'p50_s': float(np.percentile(values, 50)),
+            'p95_s': float(np.percentile(values, 95)),
+            'p99_s': float(np.percentile(values, 99)),
+        }
+        print(f"{name:12s} {len(values):5d} req  p50 {cases[name]['p50_s'] * 1000:8.1f} ms  "
+              f"p95 {cases[name]['p95_s'] * 1000:8.1f} ms  p99 {cases[name]['p99_s'] * 1000:8.1f} ms  "
+              f"errors {cases[name]['errors']}")
+    cases['overall'] = {'requests': total, 'seconds': elapsed, 'requests_per_s': total / elapsed, 'cache': stats['cache']}
+    print(f"{total} requests in {elapsed:.2f} s ({total / elapsed:.0f} req/s), cache: {stats['cache']}")
+
+    params = {'clients': args.clients, 'requests': args.requests, 'endpoints': args.endpoints, 'url': args.url}
+    print('Results written to', write_results('api_load_test', cases, params))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# Incremental beta index against full refits.
+#
+# Feeds synthetic daily returns for several tickers into a BetaIndex in batches of
+# random size, as the nightly refreshes do. There are enough days for each ring buffer
+# to wrap around several times, and _resync to run once per wraparound. After every batch,
+# the running beta and alpha over BETA_WINDOW and the beta over ROLLING_WINDOW are
+# compared with an OLS refit on the same window (np.polyfit, as the precompute does). At the end,
+# the index's rolling beta is compared with the CAPM Beta page's rolling cov/var. The run fails
+# when any value differs by more than --tolerance. The update time per appended day
+# (including the alignment done by BetaIndex.update) is reported next to the time of
+# one full refit.
+#
+#   python benchmarks/beta_index.py --days 2000 --tickers 20
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from harness import write_results
+from pages.utils.beta_index import BETA_WINDOW, BetaIndex
+from pages.utils.precompute import ROLLING_WINDOW
+
+# Daily market returns and stock returns with known betas, as aligned Series
+def synthetic_returns(days, tickers, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2010-01-04', periods=days)
+    market = pd.Series(rng.normal(0.0004, 0.01, days), index=dates, name='market')
+    betas = rng.uniform(0.3, 2.0, tickers)
+    stocks = {
+        f'T{i:03d}': pd.Series(betas[i] * market.to_numpy() + rng.normal(0.0, 0.015, days), index=dates)
+        for i in range(tickers)
+    }
+    return market, stocks
+
+def relative_difference(value, reference):
+    return abs(value - reference) / max(abs(reference), 1e-12)
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the incremental beta index against full refits')
+    parser.add_argument('--days', type=int, default=2000, help='trading days fed into the index')
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--max-batch', type=int, default=40, help='largest number of days per update')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=1e-8, help='allowed relative difference')
+    args = parser.parse_args()
+
+    market, stocks = synthetic_returns(args.days, args.tickers, args.seed)
+    constituents = pd.DataFrame({'Name': list(stocks), 'Sector': 'Synthetic'}, index=list(stocks))
+    index = BetaIndex(constituents)
+    rng = np.random.default_rng(args.seed)
+
+    worst = {'beta': 0.0, 'alpha': 0.0, 'rolling_beta': 0.0}
+    update_seconds = refit_seconds = 0.0
+    updates = appended = refits = 0
+    end = 0
+    while end < args.days:
+        end = min(end + int(rng.integers(1, args.max_batch + 1)), args.days)
+        for ticker, stock in stocks.items():
+            # The whole history so far is passed, so the index has to skip the days it already holds
+            start = time.perf_counter()
+            appended += index.update(ticker, stock.iloc[:end], market.iloc[:end])
+            update_seconds += time.perf_counter() - start
+            updates += 1
+            if end < 2:
+                continue
+            state = index.tickers[ticker]
+            for window, names in ((BETA_WINDOW, ('beta', 'alpha')), (ROLLING_WINDOW, ('rolling_beta',))):
+                x = market.iloc[max(0, end - window):end].to_numpy()
+                y = stock.iloc[max(0, end - window):end].to_numpy()
+                start = time.perf_counter()
+                reference = np.polyfit(x, y, 1)
+                refit_seconds += time.perf_counter() - start
+                refits += 1
+                for name, value, expected in zip(names, state.stats(window), reference):
+                    worst[name] = max(worst[name], relative_difference(value, expected))
+
+    # The rolling beta shown in the sector table, against the CAPM Beta page's calculation
+    table = index.table()
+    page_difference = 0.0
+    for ticker, stock in stocks.items():
+        page_beta = (stock.rolling(ROLLING_WINDOW).cov(market) / market.rolling(ROLLING_WINDOW).var()).iloc[-1]
+        page_difference = max(page_difference, relative_difference(table.at[ticker, 'rolling_beta'], page_beta))
+
+    wraparounds = args.days // index.tickers[next(iter(stocks))].size
+    print(f"{args.tickers} tickers x {args.days} days in {updates // args.tickers} batches "
+          f"({wraparounds} ring-buffer wraparounds per ticker)")
+    for name, difference in worst.items():
+        print(f'{name:<13} max rel diff vs polyfit refit {difference:.1e}')
+    print(f'{"rolling_beta":<13} max rel diff vs CAPM Beta page {page_difference:.1e}')
+    print(f'update {update_seconds / appended * 1e6:8.1f} us/day   refit {refit_seconds / refits * 1e6:8.1f} us/window')
+
+    cases = {
+        'parity': {**{f'{name}_max_rel_diff': value for name, value in worst.items()},
+                   'page_rolling_beta_max_rel_diff': page_difference},
+        'timing': {'update_us_per_day': update_seconds / appended * 1e6, 'refit_us': refit_seconds / refits * 1e6},
+    }
+    params = {'days': args.days, 'tickers': args.tickers, 'max_batch': args.max_batch, 'seed': args.seed}
+    print('Results written to', write_results('beta_index', cases, params))
+    mismatches = [name for name, value in cases['parity'].items() if not value <= args.tolerance]
+    for name in mismatches:
+        print(f"MISMATCH {name}: {cases['parity'][name]:.1e} > {args.tolerance:.0e}")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Batched Holt engine against the per-series ARIMA path on a synthetic universe.
+#
+# ARIMA is fitted series by series (as model_train does), so it is timed on a
+# sample of tickers and extrapolated to the full universe; Holt forecasts every
+# ticker in one batched call. Holdout RMSE is compared on the shared sample.
+#
+#   python benchmarks/forecast_engines.py --days 500 --tickers 1000 --arima-sample 10
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from harness import write_results
+from synthetic import synthetic_ohlcv, ticker_names
+from pages.utils import model_train
+from pages.utils.batch_forecast import forecast_universe
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the holt and arima forecasting engines')
+    parser.add_argument('--days', type=int, default=500)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--arima-sample', type=int, default=10, help='tickers fitted with ARIMA')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    names = ticker_names(args.tickers)
+    prices = pd.DataFrame({name: synthetic_ohlcv(args.days, args.seed, i)['Close'] for i, name in enumerate(names)})
+
+    start = time.perf_counter()
+    _, holt_rmse = forecast_universe(prices)
+    holt_seconds = time.perf_counter() - start
+
+    sample = names[:args.arima_sample]
+    arima_rmse = {}
+    start = time.perf_counter()
+    for name in sample:
+        series = prices[name].to_numpy()
+        differencing_order = model_train.get_differencing_order(prices[name])
+        arima_rmse[name] = model_train.evaluate_model(series, differencing_order, engine='arima')
+        model_train.get_forecast(series, differencing_order, engine='arima')
+    arima_per_ticker = (time.perf_counter() - start) / len(sample)
+
+    arima_universe = arima_per_ticker * args.tickers
+    holt_sample_rmse = holt_rmse[sample]
+    print(f'holt : {holt_seconds:8.2f} s for {args.tickers} tickers ({holt_seconds / args.tickers * 1000:.2f} ms/ticker)')
+    print(f'arima: {arima_per_ticker * 1000:8.0f} ms/ticker, ~{arima_universe:.0f} s for the universe')
+    print(f'speed-up: ~{arima_universe / holt_seconds:.0f}x')
+    print(f'holdout RMSE on the sample: holt median {np.median(holt_sample_rmse):.3f}, '
+          f'arima median {np.median(list(arima_rmse.values())):.3f}')
+
+    cases = {
+        'holt.universe': {'seconds': holt_seconds, 'median_rmse': float(holt_rmse.median())},
+        'arima.per_ticker': {'seconds': arima_per_ticker, 'median_rmse': float(np.median(list(arima_rmse.values())))},
+        'arima.universe_estimate': {'seconds': arima_universe},
+    }
+    params = {'days': args.days, 'tickers': args.tickers, 'arima_sample': args.arima_sample, 'seed': args.seed}
+    print('Results written to', write_results('forecast_engines', cases, params))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
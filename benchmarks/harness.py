@@ -0,0 +1,64 @@
+# Shared helpers for the benchmark scripts: timing, result files and regression checks.
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Benchmarks import the app modules the same way the pages do
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Run func `repeat` times (after one warm-up call) and summarise the wall-clock timings
+def time_call(func, repeat=5, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'max_s': max(timings),
+        'repeat': repeat,
+    }
+
+# Write a run to benchmarks/results/<suite>-<timestamp>.json and return the path
+def write_results(suite, cases, params=None, path=None):
+    run = {
+        'suite': suite,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': params or {},
+        'cases': cases,
+    }
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{suite}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+    return path
+
+# Compare a run with a baseline file and return the cases that slowed down past the threshold
+def find_regressions(cases, baseline_path, threshold, metric='median_s'):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['cases']
+    regressions = []
+    for name, result in cases.items():
+        if name in baseline and result[metric] > baseline[name][metric] * (1 + threshold):
+            regressions.append((name, baseline[name][metric], result[metric]))
+    return regressions
+
+# Print one result line per case
+def report(cases, metric='median_s'):
+    width = max(len(name) for name in cases) if cases else 0
+    for name, result in cases.items():
+        print(f'{name:<{width}}  {result[metric] * 1000:10.2f} ms')
@@ -0,0 +1,93 @@
+# Import-time benchmark for the Streamlit pages.
+#
+# Each page's top-level imports are replayed in a fresh interpreter under
+# `python -X importtime` and the cumulative cost of every top-level import is
+# summed. Every page imports streamlit, so the replay imports it first and the
+# page is reported as a multiple of streamlit's own import time in the same
+# interpreter. Both numbers see the same machine load, so the ratio is far more
+# stable than absolute seconds across runs and machines; the median over several
+# runs is kept. The ratios are compared against benchmarks/import_time_baseline.json
+# and the run fails when a page gets slower than the allowed threshold.
+#
+#   python benchmarks/import_time.py                 # compare with the baseline
+#   python benchmarks/import_time.py --update        # record a new baseline
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['Trading_App.py'] + sorted(
+    os.path.join('pages', name) for name in os.listdir(os.path.join(ROOT, 'pages')) if name.endswith('.py')
+)
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'import_time_baseline.json')
+REFERENCE = 'streamlit'
+
+# Collect the import statements executed when a page script starts
+def top_level_imports(page):
+    with open(os.path.join(ROOT, page), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+# Run the imports once in a fresh interpreter, after importing streamlit, and return
+# the total cumulative time divided by streamlit's
+def measure_once(statements):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '\n'.join([f'import {REFERENCE}'] + statements)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total_us = reference_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; only top-level entries are summed
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+            if name.strip() == REFERENCE:
+                reference_us = int(cumulative)
+    return total_us / reference_us
+
+def measure(page, repeat):
+    statements = top_level_imports(page)
+    return statistics.median(measure_once(statements) for _ in range(repeat))
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-page import time benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per page (median is reported)')
+    parser.add_argument('--threshold', type=float, default=0.20, help='allowed slowdown vs baseline (fraction)')
+    parser.add_argument('--update', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args()
+
+    results = {}
+    for page in PAGES:
+        results[page] = round(measure(page, args.repeat), 3)
+        print(f'{page:<32} {results[page]:6.2f}x streamlit')
+
+    if args.update:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {BASELINE_PATH}')
+        return 0
+    if not os.path.exists(BASELINE_PATH):
+        print(f'No baseline at {BASELINE_PATH}; record one with --update')
+        return 1
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    regressions = [
+        page for page, ratio in results.items()
+        if page in baseline and ratio > baseline[page] * (1 + args.threshold)
+    ]
+    for page in regressions:
+        print(f'REGRESSION {page}: {baseline[page]:.2f}x -> {results[page]:.2f}x streamlit')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
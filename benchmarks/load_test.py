@@ -0,0 +1,209 @@
+# Concurrent-session load test for the Streamlit pages.
+#
+# Each page runs in its own process so CPU time and peak RSS can be attributed
+# to it. Inside that process N simulated sessions drive the page concurrently
+# through Streamlit's AppTest, replaying a scripted set of widget interactions
+# against the replay data provider (see benchmarks/make_fixtures.py).
+# Stock_Prediction sessions wait for their forecast fit to finish. The fit times
+# show when fits start to queue on the fit service's worker pool, and the pool's
+# CPU time and peak RSS are reported next to the page process's own.
+#
+#   python benchmarks/make_fixtures.py
+#   python benchmarks/load_test.py --sessions 8 --pages Stock_Analysis,CAPM_Beta
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from harness import ROOT, write_results
+from pages.utils.data_provider import FIXTURES_DIR
+
+# Widget interactions per page: (widget kind, label, value); each one triggers a rerun
+SCENARIOS = {
+    'Stock_Analysis': [
+        ('text_input', 'Stock Ticker', '{ticker}'),
+        ('button', '1M', None),
+        ('button', 'MAX', None),
+        ('selectbox', 'Chart Type', 'Line'),
+        ('selectbox', 'Indicators', 'MACD'),
+        ('slider', 'Rolling Window (days)', 60),
+        ('selectbox', 'Select Returns Period', '1M'),
+    ],
+    'Stock_Prediction': [
+        ('text_input', 'Stock Ticker', '{ticker}'),
+        ('wait_for_fit', None, None),
+    ],
+    'CAPM_Return': [
+        ('text_input', 'Enter Stock Tickers (comma-separated)', '{tickers}'),
+        ('number_input', 'Number of years', 3),
+        ('number_input', 'Risk-free Rate (%)', 4.0),
+    ],
+    'CAPM_Beta': [
+        ('text_input', 'Stock Ticker', '{ticker}'),
+        ('slider', 'Select Rolling Window (days)', 90),
+        ('number_input', 'Risk-Free Rate (%)', 3.0),
+    ],
+}
+
+def fixture_tickers(fixture_dir):
+    return sorted(name for name in os.listdir(fixture_dir) if not name.startswith('^'))
+
+def find_widget(app, kind, label):
+    for widget in getattr(app, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f'No {kind} labelled {label!r}')
+
+def apply_interaction(app, kind, label, value):
+    widget = find_widget(app, kind, label)
+    if kind == 'button':
+        widget.click()
+    elif kind == 'text_input':
+        widget.input(value)
+    elif kind == 'selectbox':
+        widget.select(value)
+    else:
+        widget.set_value(value)
+
+# Block until the forecast fit submitted by the session's last render has finished.
+# Returns the seconds from the start of that render, i.e. how long the user waits for the forecast.
+def wait_for_fit(app, submitted_at, timeout):
+    from pages.utils.fit_service import get_fit_service
+    service = get_fit_service()
+    with service.lock:
+        job = service.session_jobs.get(app.session_state['fit_session'])
+    # No job: the forecast was served from a finished fit during the render itself
+    if job is not None and not job.done.wait(timeout):
+        raise TimeoutError(f'forecast fit did not finish within {timeout} s')
+    return time.perf_counter() - submitted_at
+
+# One simulated user: first render plus every scripted interaction, timing each rerun
+def run_session(page, session_id, tickers, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    offset = session_id % len(tickers)
+    rotated = tickers[offset:] + tickers[:offset]
+    fill = {'ticker': rotated[0], 'tickers': ','.join(rotated[:4])}
+    app = AppTest.from_file(os.path.join(ROOT, 'pages', f'{page}.py'), default_timeout=timeout)
+    latencies, fit_waits, errors = [], [], 0
+
+    start = time.perf_counter()
+    app.run()
+    latencies.append(time.perf_counter() - start)
+    errors += len(app.exception)
+
+    for kind, label, value in SCENARIOS[page]:
+        if kind == 'wait_for_fit':
+            # The previous render submitted the fit; render again once the forecast is in
+            try:
+                fit_waits.append(wait_for_fit(app, start, timeout))
+            except TimeoutError:
+                errors += 1
+            start = time.perf_counter()
+            app.run()
+            latencies.append(time.perf_counter() - start)
+            errors += len(app.exception)
+            continue
+        if isinstance(value, str):
+            value = value.format(**fill)
+        try:
+            apply_interaction(app, kind, label, value)
+        except LookupError:
+            errors += 1
+            continue
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        errors += len(app.exception)
+    return latencies, fit_waits, errors
+
+# Runs in a child process: drive `sessions` concurrent sessions of one page and measure the process.
+# Forecast fits run in the fit service's worker processes. The pool is shut down before measuring,
+# so its workers are reaped and their CPU time and peak RSS show up in the children's rusage.
+def run_page(page, sessions, tickers, timeout, queue):
+    os.chdir(ROOT)
+    times_start = os.times()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        outcomes = list(pool.map(lambda i: run_session(page, i, tickers, timeout), range(sessions)))
+    wall = time.perf_counter() - wall_start
+    from pages.utils.fit_service import get_fit_service
+    get_fit_service().pool.shutdown(wait=True)
+    times_end = os.times()
+    cpu = sum(times_end[:2]) - sum(times_start[:2])
+    fit_cpu = sum(times_end[2:4]) - sum(times_start[2:4])
+
+    latencies = np.array([latency for session_latencies, _, _ in outcomes for latency in session_latencies])
+    fit_waits = np.array([wait for _, session_waits, _ in outcomes for wait in session_waits])
+    fit_stats = {}
+    if fit_waits.size:
+        fit_stats = {
+            'fit_p50_s': float(np.percentile(fit_waits, 50)),
+            'fit_p95_s': float(np.percentile(fit_waits, 95)),
+            'fit_max_s': float(fit_waits.max()),
+        }
+    queue.put({
+        'sessions': sessions,
+        'renders': int(latencies.size),
+        'errors': int(sum(errors for _, _, errors in outcomes)),
+        'p50_s': float(np.percentile(latencies, 50)),
+        'p95_s': float(np.percentile(latencies, 95)),
+        'p99_s': float(np.percentile(latencies, 99)),
+        'max_s': float(latencies.max()),
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'cpu_utilisation': cpu / wall if wall else 0.0,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'fit_cpu_s': fit_cpu,
+        # Largest single worker process, as reported by the kernel for reaped children
+        'fit_peak_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        **fit_stats,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent-session load test for the Streamlit pages')
+    parser.add_argument('--sessions', type=int, default=4, help='concurrent simulated sessions per page')
+    parser.add_argument('--pages', default=','.join(SCENARIOS), help='comma-separated page names')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='replay fixture directory')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='injected latency per data call')
+    parser.add_argument('--timeout', type=float, default=120.0, help='per-render timeout in seconds')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixtures):
+        print(f'No fixtures in {args.fixtures}; run benchmarks/make_fixtures.py first')
+        return 1
+    # Child processes inherit the environment, so every page reads the replay fixtures
+    os.environ['TRADING_APP_DATA_PROVIDER'] = 'replay'
+    os.environ['TRADING_APP_FIXTURES'] = os.path.abspath(args.fixtures)
+    os.environ['TRADING_APP_REPLAY_LATENCY_MS'] = str(args.latency_ms)
+    tickers = fixture_tickers(args.fixtures)
+
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for page in args.pages.split(','):
+        queue = context.Queue()
+        process = context.Process(target=run_page, args=(page, args.sessions, tickers, args.timeout, queue))
+        process.start()
+        # Bounded wait so a crashed child does not hang the run
+        results[page] = queue.get(timeout=args.timeout * (len(SCENARIOS[page]) + 1) * args.sessions)
+        process.join()
+        result = results[page]
+        fits = ''
+        if 'fit_p50_s' in result:
+            fits = (f"  fit p50 {result['fit_p50_s']:6.1f} s  p95 {result['fit_p95_s']:6.1f} s  "
+                    f"fit cpu {result['fit_cpu_s']:6.1f} s  fit rss {result['fit_peak_rss_mb']:7.1f} MB")
+        print(f"{page:<18} p50 {result['p50_s'] * 1000:8.0f} ms  p95 {result['p95_s'] * 1000:8.0f} ms  "
+              f"p99 {result['p99_s'] * 1000:8.0f} ms  cpu {result['cpu_s']:6.1f} s  "
+              f"rss {result['peak_rss_mb']:7.1f} MB  errors {result['errors']}{fits}")
+
+    params = {'sessions': args.sessions, 'latency_ms': args.latency_ms, 'tickers': tickers}
+    print('Results written to', write_results('load_test', results, params))
+    return 1 if any(result['errors'] for result in results.values()) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# Write synthetic replay fixtures so the app, load tests and benchmarks run without the network.
+#
+#   python benchmarks/make_fixtures.py --days 2520 --dir fixtures
+#   TRADING_APP_DATA_PROVIDER=replay streamlit run Trading_App.py
+import argparse
+import datetime
+
+import numpy as np
+
+from harness import ROOT  # noqa: F401  (puts the repo root on sys.path)
+from synthetic import synthetic_ohlcv, synthetic_market
+from pages.utils.data_provider import FIXTURES_DIR, write_fixture
+
+# Tickers the pages use by default, plus the market index
+DEFAULT_TICKERS = ['TSLA', 'AAPL', 'AMZN', 'GOOGL', 'MSFT', 'META']
+MARKET_TICKER = '^GSPC'
+
+def synthetic_info(ticker, history):
+    return {
+        'symbol': ticker,
+        'longBusinessSummary': f'{ticker} is a synthetic company generated for offline runs.',
+        'sector': 'Technology',
+        'fullTimeEmployees': 10000,
+        'website': 'https://example.com',
+        'marketCap': int(history['Close'].iloc[-1] * 1e9),
+        'beta': 1.0,
+        'trailingEps': 5.0,
+        'trailingPE': round(float(history['Close'].iloc[-1]) / 5.0, 2),
+        'exchangeTimezoneName': 'America/New_York',
+    }
+
+# Quarterly dividends on every 63rd bar, zero elsewhere (the layout of Ticker.history)
+def with_corporate_actions(history):
+    history = history.copy()
+    dividends = np.zeros(len(history))
+    dividends[::63] = 0.25
+    history['Dividends'] = dividends
+    history['Stock Splits'] = 0.0
+    return history
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic replay fixtures')
+    parser.add_argument('tickers', nargs='*', default=DEFAULT_TICKERS)
+    parser.add_argument('--days', type=int, default=2520, help='trading days per ticker, ending today')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dir', default=FIXTURES_DIR)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    args = parser.parse_args()
+
+    end = datetime.date.today()
+    market = with_corporate_actions(synthetic_market(args.days, args.seed, end=end))
+    write_fixture(MARKET_TICKER, market, synthetic_info(MARKET_TICKER, market), args.dir, args.format)
+    for position, ticker in enumerate(args.tickers):
+        history = with_corporate_actions(synthetic_ohlcv(args.days, args.seed, position, end=end))
+        write_fixture(ticker, history, synthetic_info(ticker, history), args.dir, args.format)
+    print(f'Wrote {len(args.tickers) + 1} fixtures to {args.dir}')
+
+if __name__ == '__main__':
+    main()
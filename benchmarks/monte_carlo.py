@@ -0,0 +1,57 @@
+# Monte Carlo throughput and peak memory by chunk size.
+#
+# Each case simulates --paths price paths over --horizon days from a synthetic
+# history and reports paths per second and the peak traced allocation, which
+# should track the chunk size rather than the number of paths.
+#
+#   python benchmarks/monte_carlo.py --paths 200000 --chunks 1000 10000 50000
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from harness import write_results
+from synthetic import synthetic_ohlcv
+from pages.utils.monte_carlo import log_returns, simulate
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Monte Carlo path generation')
+    parser.add_argument('--days', type=int, default=750)
+    parser.add_argument('--paths', type=int, default=100_000)
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--assets', type=int, default=5, help='assets in the portfolio cases')
+    parser.add_argument('--chunks', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    single = log_returns(synthetic_ohlcv(args.days, args.seed, 0)['Close'])
+    portfolio = log_returns(np.column_stack([synthetic_ohlcv(args.days, args.seed, i)['Close'] for i in range(args.assets)]))
+    weights = np.full(args.assets, 1 / args.assets)
+
+    runs = {
+        'bootstrap': dict(returns=single, method='bootstrap'),
+        'gbm': dict(returns=single, method='gbm'),
+        'portfolio_bootstrap': dict(returns=portfolio, method='bootstrap', weights=weights),
+    }
+    cases = {}
+    for name, kwargs in runs.items():
+        for chunk in args.chunks:
+            tracemalloc.start()
+            start = time.perf_counter()
+            simulate(horizon=args.horizon, n_paths=args.paths, chunk_size=chunk, seed=args.seed, **kwargs)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            key = f'{name}.chunk_{chunk}'
+            cases[key] = {'seconds': seconds, 'paths_per_second': args.paths / seconds, 'peak_mb': peak / 1e6}
+            print(f'{key:36s} {args.paths / seconds:12,.0f} paths/s  peak {peak / 1e6:8.1f} MB')
+
+    params = {'days': args.days, 'paths': args.paths, 'horizon': args.horizon,
+              'assets': args.assets, 'seed': args.seed}
+    print('Results written to', write_results('monte_carlo', cases, params))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# Out-of-core rolling analytics over synthetic minute bars.
+#
+# Writes --years of one-minute bars (390 per trading day) for a stock and a market
+# series into a scratch bar store, then runs the volatility, rolling beta and RSI
+# pipelines for each history length. It reports throughput and peak traced memory,
+# which should stay flat as the history grows. The shortest history that spans more
+# than one chunk is also checked against the in-memory pandas implementations, and the
+# run fails when a pipeline differs by more than --tolerance.
+#
+#   python benchmarks/out_of_core.py --years 1 5 10 --chunk-rows 50000
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from harness import write_results
+from pages.utils import out_of_core
+
+BARS_PER_DAY = 390
+DAYS_PER_YEAR = 252
+
+# Minute bars for one year of trading days, as (stock, market) frames
+def minute_year(year, seed, stock_start, market_start):
+    rng = np.random.default_rng([seed, year])
+    days = pd.bdate_range('2000-01-03', periods=DAYS_PER_YEAR * (year + 1))[-DAYS_PER_YEAR:]
+    minutes = np.arange(BARS_PER_DAY) * 60_000_000_000 + (14 * 60 + 30) * 60_000_000_000
+    index = pd.DatetimeIndex((days.as_unit('ns').asi8[:, None] + minutes).ravel()).tz_localize('UTC')
+    market_returns = rng.normal(0.0, 0.0006, len(index))
+    stock_returns = 1.3 * market_returns + rng.normal(0.0, 0.0008, len(index))
+    market = market_start * np.exp(np.cumsum(market_returns))
+    stock = stock_start * np.exp(np.cumsum(stock_returns))
+    return pd.DataFrame({'Close': stock}, index=index), pd.DataFrame({'Close': market}, index=index)
+
+def write_history(years, seed):
+    stock_last, market_last = 100.0, 1000.0
+    for year in range(years):
+        stock, market = minute_year(year, seed, stock_last, market_last)
+        out_of_core.write_bars('STOCK', [stock])
+        out_of_core.write_bars('MARKET', [market])
+        stock_last, market_last = stock['Close'].iloc[-1], market['Close'].iloc[-1]
+
+# Consume a pipeline without keeping its output; returns (rows, seconds, peak traced bytes)
+def drain(chunks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, seconds, peak
+
+def pipelines(args):
+    return {
+        'volatility': lambda: out_of_core.rolling_volatility('STOCK', args.window, args.chunk_rows),
+        'rolling_beta': lambda: out_of_core.rolling_beta('STOCK', 'MARKET', args.window, args.chunk_rows),
+        'rsi': lambda: out_of_core.rsi('STOCK', chunk_rows=args.chunk_rows),
+    }
+
+# In-memory reference implementations, as the pages compute them
+def in_memory(args):
+    stock = pd.Series(np.asarray(out_of_core.read_column('STOCK', 'Close')))
+    market = pd.Series(np.asarray(out_of_core.read_column('MARKET', 'Close')))
+    returns = pd.concat([stock.pct_change(), market.pct_change()], axis=1).dropna()
+    beta = returns[0].rolling(args.window).cov(returns[1]) / returns[1].rolling(args.window).var()
+    try:
+        from pages.utils.plotly_figure import _pandas_ta
+        rsi = _pandas_ta().rsi(stock)
+    except ImportError:
+        # pandas_ta.rsi: Wilder smoothing of gains and losses with ewm(alpha=1/14, min_periods=14)
+        change = stock.diff()
+        gains = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+        losses = change.clip(upper=0).ewm(alpha=1 / 14, min_periods=14).mean()
+        rsi = 100 * gains / (gains + losses.abs())
+    return {'volatility': stock.rolling(args.window).std(), 'rolling_beta': beta, 'rsi': rsi}
+
+def max_difference(streamed, reference):
+    streamed, reference = np.asarray(streamed, dtype=float), np.asarray(reference, dtype=float)
+    if streamed.shape != reference.shape or not np.array_equal(np.isnan(streamed), np.isnan(reference)):
+        return float('inf')
+    mask = ~np.isnan(reference)
+    return float(np.max(np.abs(streamed[mask] - reference[mask]) / np.maximum(np.abs(reference[mask]), 1e-12)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark out-of-core rolling analytics')
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--chunk-rows', type=int, default=out_of_core.CHUNK_ROWS)
+    parser.add_argument('--window', type=int, default=390, help='rolling window in bars')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=1e-7, help='allowed relative difference from pandas')
+    args = parser.parse_args()
+
+    # The parity check only means something when the pipelines carry state across chunks
+    multi_chunk = [years for years in args.years if years * DAYS_PER_YEAR * BARS_PER_DAY > args.chunk_rows]
+    check_years = min(multi_chunk) if multi_chunk else None
+    if check_years is None:
+        print('No history spans more than one chunk; the parity check is skipped')
+
+    cases = {}
+    for years in sorted(args.years):
+        with tempfile.TemporaryDirectory() as scratch:
+            out_of_core.BARS_DIR = scratch
+            write_history(years, args.seed)
+            for name, pipeline in pipelines(args).items():
+                rows, seconds, peak = drain(pipeline())
+                case = {'rows': rows, 'seconds': seconds, 'rows_per_s': rows / seconds, 'peak_mb': peak / 1e6}
+                if years == check_years:
+                    streamed = out_of_core.collect(pipeline())
+                    case['max_rel_diff'] = max_difference(streamed, in_memory(args)[name])
+                cases[f'{name}.years_{years}'] = case
+                check = f"  max rel diff {case['max_rel_diff']:.1e}" if 'max_rel_diff' in case else ''
+                print(f'{name:13s} {years:3d} y  {rows:>10,} rows  {rows / seconds:12,.0f} rows/s  '
+                      f'peak {peak / 1e6:7.1f} MB{check}')
+
+    params = {'years': args.years, 'chunk_rows': args.chunk_rows, 'window': args.window, 'seed': args.seed}
+    print('Results written to', write_results('out_of_core', cases, params))
+    mismatches = [name for name, case in cases.items() if case.get('max_rel_diff', 0.0) > args.tolerance]
+    for name in mismatches:
+        print(f"MISMATCH {name}: max rel diff {cases[name]['max_rel_diff']:.1e} > {args.tolerance:.0e}")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
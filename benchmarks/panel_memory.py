@@ -0,0 +1,70 @@
+# Memory and speed of the float32 PricePanel against a float64 pandas frame,
+# plus the precision actually observed against the float64 results.
+#
+#   python benchmarks/panel_memory.py --days 2520 --tickers 2000
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from harness import time_call, write_results, report
+from synthetic import trading_days
+from pages.utils import price_panel
+from pages.utils.price_panel import PricePanel
+
+# Wide CAPM_Return-shaped close frame; a plain random walk keeps generation fast at large sizes
+def close_frame(days, tickers, seed):
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0003, 0.02, (days, tickers + 1))
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+    frame = pd.DataFrame(prices, columns=[f'T{i:04d}' for i in range(tickers)] + ['SP500'])
+    frame.insert(0, 'Date', trading_days(days))
+    return frame
+
+def main():
+    parser = argparse.ArgumentParser(description='PricePanel memory and precision benchmark')
+    parser.add_argument('--days', type=int, default=2520)
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    frame = close_frame(args.days, args.tickers, args.seed)
+    prices = frame.drop(columns='Date')
+    panel = PricePanel.from_frame(frame)
+
+    frame_bytes = int(frame.memory_usage(deep=True).sum())
+    print(f'float64 frame: {frame_bytes / 1e6:9.1f} MB')
+    print(f'float32 panel: {panel.nbytes / 1e6:9.1f} MB  ({panel.nbytes / frame_bytes:.0%})')
+
+    # Vectorised float64 equivalents of the capm_functions helpers
+    def frame_returns():
+        returns = prices.pct_change() * 100
+        returns.iloc[0] = 0
+        return returns
+
+    cases = {
+        'frame.daily_return': time_call(frame_returns, args.repeat),
+        'panel.daily_return': time_call(lambda: price_panel.daily_return(panel), args.repeat),
+        'frame.corr': time_call(lambda: frame_returns().corr(), 1),
+        'panel.corr': time_call(lambda: price_panel.daily_return(panel).corr(), 1),
+    }
+    report(cases)
+
+    returns64 = frame_returns()
+    returns32 = price_panel.daily_return(panel)
+    return_error = float(np.abs(returns32.values - returns64.values).max())
+    beta64 = np.polyfit(returns64['SP500'], returns64['T0000'], 1)[0]
+    beta32 = price_panel.calculate_beta(returns32, 'T0000')[0]
+    beta_error = abs(beta32 - beta64) / abs(beta64)
+    print(f'max return error: {return_error:.2e} percentage points, beta relative error: {beta_error:.2e}')
+
+    params = {'days': args.days, 'tickers': args.tickers, 'seed': args.seed}
+    cases['memory'] = {'frame_bytes': frame_bytes, 'panel_bytes': panel.nbytes}
+    cases['precision'] = {'max_return_error_pct': return_error, 'beta_relative_error': float(beta_error)}
+    print('Results written to', write_results('price_panel', cases, params))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
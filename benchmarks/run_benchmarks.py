@@ -0,0 +1,113 @@
+# Hot-path benchmarks for capm_functions, the model_train pipeline and the plotly_figure builders.
+#
+#   python benchmarks/run_benchmarks.py --days 756 --tickers 20
+#   python benchmarks/run_benchmarks.py --save-baseline          # record benchmarks/hot_paths_baseline.json
+#   python benchmarks/run_benchmarks.py --threshold 0.25         # fail if a case is >25% slower than baseline
+import argparse
+import os
+import sys
+
+from harness import ROOT, time_call, write_results, find_regressions, report
+from synthetic import synthetic_close_frame, synthetic_ohlcv
+
+import capm_functions
+from pages.utils import model_train
+from pages.utils import plotly_figure
+
+# Returns, normalisation and beta on a CAPM_Return-shaped close frame
+def capm_cases(days, tickers, seed):
+    stocks_df = synthetic_close_frame(days, tickers, seed)
+    returns = capm_functions.daily_return(stocks_df)
+    names = [col for col in stocks_df.columns if col not in ('Date', 'SP500')]
+
+    def all_betas():
+        for name in names:
+            capm_functions.calculate_beta(returns, name)
+
+    return {
+        'capm.daily_return': lambda: capm_functions.daily_return(stocks_df),
+        'capm.normalize': lambda: capm_functions.normalize(stocks_df),
+        'capm.calculate_beta': all_betas,
+    }
+
+# The Stock_Prediction pipeline: rolling mean -> differencing -> scaling -> fit -> forecast
+def model_cases(days, seed):
+    close_price = synthetic_ohlcv(days, seed)[['Close']]
+    rolling_price = model_train.get_rolling_mean(close_price)
+    differencing_order = model_train.get_differencing_order(rolling_price)
+    scaled_data, scaler = model_train.scaling(rolling_price)
+
+    def pipeline():
+        rolling = model_train.get_rolling_mean(close_price)
+        d = model_train.get_differencing_order(rolling)
+        scaled, fitted_scaler = model_train.scaling(rolling)
+        model_train.evaluate_model(scaled, d)
+        forecast = model_train.get_forecast(scaled, d)
+        model_train.inverse_scaling(fitted_scaler, forecast['Close'])
+
+    return {
+        'model_train.get_rolling_mean': lambda: model_train.get_rolling_mean(close_price),
+        'model_train.get_differencing_order': lambda: model_train.get_differencing_order(rolling_price),
+        'model_train.scaling': lambda: model_train.scaling(rolling_price),
+        'model_train.evaluate_model': lambda: model_train.evaluate_model(scaled_data, differencing_order),
+        'model_train.get_forecast': lambda: model_train.get_forecast(scaled_data, differencing_order),
+        'model_train.pipeline': pipeline,
+    }
+
+# Every figure builder on a history frame shaped like Ticker.history(period='max')
+def figure_cases(days, seed):
+    history = synthetic_ohlcv(days, seed)
+    forecast = history[['Close']].iloc[-200:]
+    return {
+        'plotly_figure.plotly_table': lambda: plotly_figure.plotly_table(history.tail(10).round(3)),
+        'plotly_figure.close_chart': lambda: plotly_figure.close_chart(history.copy(), 'max'),
+        'plotly_figure.candlestick': lambda: plotly_figure.candlestick(history.copy(), 'max'),
+        'plotly_figure.RSI': lambda: plotly_figure.RSI(history.copy(), 'max'),
+        'plotly_figure.MACD': lambda: plotly_figure.MACD(history.copy(), 'max'),
+        'plotly_figure.Moving_average': lambda: plotly_figure.Moving_average(history.copy(), 'max'),
+        'plotly_figure.Moving_average_forecast': lambda: plotly_figure.Moving_average_forecast(forecast),
+        'plotly_figure.to_json': lambda: plotly_figure.candlestick(history.copy(), 'max').to_json(),
+    }
+
+# Committed next to the script, unlike the per-run files in the ignored results/ directory
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'hot_paths_baseline.json')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the app hot paths on synthetic OHLCV data')
+    parser.add_argument('--days', type=int, default=756, help='trading days per ticker')
+    parser.add_argument('--tickers', type=int, default=10, help='tickers in the CAPM panel')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', default='', help='comma-separated case name prefixes to run')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown vs baseline (fraction)')
+    args = parser.parse_args()
+
+    cases = {}
+    cases.update(capm_cases(args.days, args.tickers, args.seed))
+    cases.update(model_cases(args.days, args.seed))
+    cases.update(figure_cases(args.days, args.seed))
+    if args.only:
+        prefixes = tuple(prefix.strip() for prefix in args.only.split(','))
+        cases = {name: case for name, case in cases.items() if name.startswith(prefixes)}
+
+    results = {name: time_call(case, repeat=args.repeat) for name, case in cases.items()}
+    report(results)
+    params = {'days': args.days, 'tickers': args.tickers, 'seed': args.seed}
+    print('Results written to', write_results('hot_paths', results, params))
+
+    if args.save_baseline:
+        write_results('hot_paths', results, params, path=args.baseline)
+        print('Baseline written to', args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; record one with --save-baseline')
+        return 1
+    regressions = find_regressions(results, args.baseline, args.threshold)
+    for name, before, after in regressions:
+        print(f'REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
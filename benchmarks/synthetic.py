@@ -0,0 +1,66 @@
+# Deterministic synthetic market data for benchmarks and offline runs.
+#
+# Prices follow a one-factor model: every ticker's log return is
+# beta * market return + idiosyncratic noise, so betas and correlations
+# computed on the output are meaningful. The same (seed, ticker position)
+# always produces the same series.
+import numpy as np
+import pandas as pd
+
+MARKET = 'SP500'
+
+# Trading-day index shared by all generated frames; pass `end` to finish on a given day instead
+def trading_days(days, start='2000-01-03', end=None):
+    if end is not None:
+        return pd.bdate_range(end=end, periods=days, name='Date')
+    return pd.bdate_range(start=start, periods=days, name='Date')
+
+def _market_log_returns(days, seed):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0003, 0.011, days)
+
+# Build OHLCV bars around a series of close-to-close log returns
+def _bars(log_returns, rng, start_price):
+    days = len(log_returns)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    previous_close = np.concatenate([[start_price], close[:-1]])
+    open_ = previous_close * np.exp(rng.normal(0, 0.004, days))
+    wick = np.abs(rng.normal(0, 0.006, (2, days)))
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    volume = rng.integers(100_000, 10_000_000, days)
+    return open_, high, low, close, volume
+
+# Daily OHLCV history for one ticker, indexed like yfinance's Ticker.history()
+def synthetic_ohlcv(days, seed=0, position=0, beta=None, end=None):
+    rng = np.random.default_rng([seed, position + 1])
+    beta = rng.uniform(0.5, 1.8) if beta is None else beta
+    log_returns = beta * _market_log_returns(days, seed) + rng.normal(0, 0.015, days)
+    open_, high, low, close, volume = _bars(log_returns, rng, rng.uniform(20, 400))
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+        index=trading_days(days, end=end)
+    )
+
+# Daily OHLCV history of the market index itself
+def synthetic_market(days, seed=0, end=None):
+    rng = np.random.default_rng([seed, 0])
+    open_, high, low, close, volume = _bars(_market_log_returns(days, seed), rng, 1500.0)
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+        index=trading_days(days, end=end)
+    )
+
+# Ticker names used for generated panels (T0000, T0001, ...)
+def ticker_names(tickers):
+    return [f'T{i:04d}' for i in range(tickers)]
+
+# {ticker: OHLCV frame} for a days x tickers panel
+def synthetic_panel(days, tickers, seed=0):
+    return {name: synthetic_ohlcv(days, seed, i) for i, name in enumerate(ticker_names(tickers))}
+
+# Wide close-price frame shaped like the one built in CAPM_Return (Date, tickers..., SP500)
+def synthetic_close_frame(days, tickers, seed=0):
+    frame = pd.DataFrame({name: synthetic_ohlcv(days, seed, i)['Close'] for i, name in enumerate(ticker_names(tickers))})
+    frame[MARKET] = synthetic_market(days, seed)['Close']
+    return frame.reset_index()
@@ -0,0 +1,41 @@
+# Payload size and build time of the whole-frame table against one paginated page.
+#
+# The payload is the figure JSON that Streamlit ships to the browser.
+#
+#   python benchmarks/table_payload.py --rows 1000 10000 100000
+import argparse
+import sys
+import time
+
+from harness import write_results
+from synthetic import synthetic_ohlcv
+from pages.utils.plotly_figure import plotly_table
+from pages.utils.paged_table import PAGE_SIZE
+
+def measure(builder):
+    start = time.perf_counter()
+    payload = builder().to_json()
+    return {'seconds': time.perf_counter() - start, 'payload_bytes': len(payload)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark table payload sizes')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cases = {}
+    for rows in args.rows:
+        history = synthetic_ohlcv(rows, args.seed, 0)
+        cases[f'whole_frame.rows_{rows}'] = measure(lambda: plotly_table(history))
+        cases[f'paged.rows_{rows}'] = measure(lambda: plotly_table(history, page=0, page_size=args.page_size))
+        whole, paged = cases[f'whole_frame.rows_{rows}'], cases[f'paged.rows_{rows}']
+        print(f'{rows:>8} rows: whole {whole["payload_bytes"] / 1e3:10.1f} kB {whole["seconds"] * 1000:8.1f} ms | '
+              f'paged {paged["payload_bytes"] / 1e3:6.1f} kB {paged["seconds"] * 1000:6.1f} ms')
+
+    params = {'rows': args.rows, 'page_size': args.page_size, 'seed': args.seed}
+    print('Results written to', write_results('table_payload', cases, params))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,12 @@
-import plotly.express as px 
 import numpy as np
+from pages.utils.tracing import trace
+from pages.utils import price_panel
+from pages.utils.price_panel import PricePanel
 
 # Function to plot interactive plotly chart
+@trace('capm_functions.interactive_plot')
 def interactive_plot(df):
+    import plotly.express as px
     fig = px.line()
     for i in df.columns[1:]:
         fig.add_scatter(x=df['Date'], y=df[i], name=i)
@@ -12,14 +16,20 @@ def interactive_plot(df):
     return fig
 
 # Function to normalize the prices based on the initial price
+@trace('capm_functions.normalize')
 def normalize(df_2):
+    if isinstance(df_2, PricePanel):
+        return price_panel.normalize(df_2)
     df = df_2.copy()
     for i in df.columns[1:]:
         df.loc[:, i] = df[i] / df[i].iloc[0]  # Use .loc[] to avoid chained assignment
     return df
 
 # Function to calculate daily returns
+@trace('capm_functions.daily_return')
 def daily_return(df):
+    if isinstance(df, PricePanel):
+        return price_panel.daily_return(df)
     d_daily_return = df.copy()
     for i in df.columns[1:]:
         for j in range(1, len(df)):
@@ -28,7 +38,10 @@ def daily_return(df):
     return d_daily_return
 
 # Function to calculate beta
+@trace('capm_functions.calculate_beta')
 def calculate_beta(stocks_daily_return, stock):
+    if isinstance(stocks_daily_return, PricePanel):
+        return price_panel.calculate_beta(stocks_daily_return, stock)
     rm = stocks_daily_return['SP500'].mean() * 252  # Annualized market return
     b, a = np.polyfit(stocks_daily_return['SP500'], stocks_daily_return[stock], 1)
     return b, a
@@ -0,0 +1,52 @@
+# Scheduler entry point: after each market close, refresh prices and precompute
+# forecasts, CAPM metrics and indicator snapshots for the watchlist.
+#
+#   python nightly_precompute.py            # run every weekday after the close
+#   python nightly_precompute.py --once     # run a single refresh now (e.g. from cron)
+import argparse
+import datetime
+import os
+import time
+from zoneinfo import ZoneInfo
+
+from pages.utils.precompute import load_watchlist, run_precompute, WATCHLIST_PATH
+
+MARKET_TZ = ZoneInfo('America/New_York')
+# Local market time to start the run, leaving a margin after the 16:00 close for final prices
+RUN_AT = os.environ.get('TRADING_APP_PRECOMPUTE_AT', '16:30')
+
+# Next weekday at RUN_AT in market time
+def next_run(now):
+    hour, minute = (int(part) for part in RUN_AT.split(':'))
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += datetime.timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += datetime.timedelta(days=1)
+    return candidate
+
+def run_once(watchlist_path, workers):
+    watchlist = load_watchlist(watchlist_path)
+    record = run_precompute(watchlist, run_date=datetime.datetime.now(MARKET_TZ).date(), workers=workers)
+    print(f"Precomputed {record['tickers']} tickers in {record['duration_s']:.1f} s "
+          f"(stages: {record['stages_s']}, failed: {record['failed'] or 'none'})")
+
+def main():
+    parser = argparse.ArgumentParser(description='Nightly precomputation for the watchlist')
+    parser.add_argument('--once', action='store_true', help='run one refresh immediately and exit')
+    parser.add_argument('--watchlist', default=WATCHLIST_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='processes used for forecast fits')
+    args = parser.parse_args()
+
+    if args.once:
+        run_once(args.watchlist, args.workers)
+        return
+    while True:
+        now = datetime.datetime.now(MARKET_TZ)
+        scheduled = next_run(now)
+        print(f"Next precompute run at {scheduled:%Y-%m-%d %H:%M %Z}")
+        time.sleep((scheduled - now).total_seconds())
+        run_once(args.watchlist, args.workers)
+
+if __name__ == '__main__':
+    main()
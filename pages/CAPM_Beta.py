@@ -1,14 +1,16 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
-import plotly.express as px
 import datetime
+from pages.utils.tracing import trace, start_render, render_trace_panel
+from pages.utils.data_provider import get_provider
+from pages.utils.precompute import load_precomputed, is_current, MARKET_TICKER
+from pages.utils.beta_index import load_beta_index, beta_index_mtime
 
 # Page Configuration
 st.set_page_config(page_title="CAPM Beta Calculator", page_icon="📊", layout="wide")
 st.title("CAPM Beta Calculator")
+start_render("CAPM_Beta")
 # Display description about what the website provides
 # st.write("""
 #     **CAPM Beta Calculator** helps you analyze the performance of a stock in relation to a market index. 
@@ -57,12 +59,42 @@ with col1:
 with col2:
     market_ticker = st.text_input("Market Index Ticker (e.g., ^GSPC for S&P 500)", "^GSPC")
 with col3:
-    start_date = st.date_input("Start Date", datetime.date(today.year - 1, today.month, today.day))
+    # Same one-year window as the nightly precompute, which clamps 29 February to the 28th
+    default_start = (pd.Timestamp(today) - pd.DateOffset(years=1)).date()
+    start_date = st.date_input("Start Date", default_start)
     end_date = st.date_input("End Date", today)
 
+# Nightly precomputed CAPM metrics cover the default window against the default index
+uses_defaults = market_ticker == MARKET_TICKER and start_date == default_start and end_date == today
+
+def precomputed_capm(ticker):
+    if not uses_defaults:
+        return None
+    payload = load_precomputed(ticker)
+    if payload is None or 'capm' not in payload or not is_current(payload):
+        return None
+    return payload['capm']
+
+# Function to load the beta index once per refresh; the file's mtime is part of the cache key
+@st.cache_resource(max_entries=4, show_spinner=False)
+def cached_beta_index(market, mtime):
+    return load_beta_index(market)
+
+# Function to fit an OLS regression with an intercept; statsmodels is imported on first use
+def fit_ols(y, x):
+    import statsmodels.api as sm
+    return sm.OLS(y, sm.add_constant(x)).fit()
+
+# Function to plot returns against each other with an OLS trendline
+def returns_scatter(data, title):
+    import plotly.express as px
+    return px.scatter(data, x="Market Return", y="Stock Return", trendline="ols", title=title)
+
 # Fetch Stock & Market Data
-stock_data = yf.download(stock_ticker, start=start_date, end=end_date)
-market_data = yf.download(market_ticker, start=start_date, end=end_date)
+provider = get_provider()
+with trace('fetch.download'):
+    stock_data = provider.download(stock_ticker, start=start_date, end=end_date)
+    market_data = provider.download(market_ticker, start=start_date, end=end_date)
 
 # Ensure data has 'Adj Close' or fall back to 'Close'
 if 'Adj Close' in stock_data.columns:
@@ -86,27 +118,35 @@ else:
 # Drop NaN values
 data = pd.merge(stock_data["Stock Return"], market_data["Market Return"], left_index=True, right_index=True).dropna()
 
-# CAPM Regression (OLS)
-X = sm.add_constant(data["Market Return"])  # Add constant for intercept
-y = data["Stock Return"]
-model = sm.OLS(y, X).fit()
-beta = model.params.iloc[1]  # Beta coefficient
-alpha = model.params.iloc[0]  # Alpha coefficient
+# CAPM Regression (OLS), read from the nightly run when it covers these inputs
+stock_capm = precomputed_capm(stock_ticker)
+model = None
+if stock_capm is not None:
+    beta, alpha = stock_capm['beta'], stock_capm['alpha']
+else:
+    with trace('capm_beta.ols'):
+        model = fit_ols(data["Stock Return"], data["Market Return"])
+    beta = model.params.iloc[1]  # Beta coefficient
+    alpha = model.params.iloc[0]  # Alpha coefficient
 
 # Display Beta & Alpha Values
 st.subheader(f"Beta Value for {stock_ticker}: **{round(beta, 3)}**")
 st.subheader(f"Alpha Value for {stock_ticker}: **{round(alpha, 3)}**")
+if stock_capm is not None:
+    st.caption(f"From the nightly precomputed run of {stock_capm['end']:%Y-%m-%d}.")
 
 # Scatter Plot of Returns
-fig = px.scatter(data, x="Market Return", y="Stock Return", trendline="ols",
-                 title=f"Stock vs. Market Returns ({stock_ticker} vs {market_ticker})")
+fig = returns_scatter(data, f"Stock vs. Market Returns ({stock_ticker} vs {market_ticker})")
 st.plotly_chart(fig, use_container_width=True)
 
 # Rolling Beta Calculation
 rolling_window = st.slider("Select Rolling Window (days)", min_value=30, max_value=365, value=180, step=30)
 
-rolling_beta = data["Stock Return"].rolling(rolling_window).cov(data["Market Return"]) / \
-               data["Market Return"].rolling(rolling_window).var()
+if stock_capm is not None and stock_capm['rolling_window'] == rolling_window:
+    rolling_beta = stock_capm['rolling_beta']
+else:
+    rolling_beta = data["Stock Return"].rolling(rolling_window).cov(data["Market Return"]) / \
+                   data["Market Return"].rolling(rolling_window).var()
 
 st.subheader("Rolling Beta Over Time")
 st.line_chart(rolling_beta.dropna(), use_container_width=True)
@@ -114,34 +154,65 @@ st.line_chart(rolling_beta.dropna(), use_container_width=True)
 # Sector Beta Comparison
 st.subheader("Sector Beta Comparison")
 
-sector_tickers = ["AAPL", "MSFT", "GOOGL", "AMZN", "META"]  # Example tech sector stocks
-sector_betas = {}
-
-for ticker in sector_tickers:
-    stock_data = yf.download(ticker, start=start_date, end=end_date)
-    stock_data["Return"] = stock_data["Adj Close"].pct_change() if "Adj Close" in stock_data.columns else stock_data["Close"].pct_change()
-    data_comp = pd.merge(stock_data["Return"], market_data["Market Return"], left_index=True, right_index=True).dropna()
-    
-    if not data_comp.empty:
-        X_comp = sm.add_constant(data_comp["Market Return"])
-        y_comp = data_comp["Return"]
-        model_comp = sm.OLS(y_comp, X_comp).fit()
-        sector_betas[ticker] = model_comp.params.iloc[1]
-
-st.bar_chart(pd.Series(sector_betas))
+# The maintained beta index covers the default one-year window against the default index.
+# Like the precomputed metrics, it is only used while no trading day has closed since its last update.
+beta_index = None
+index_mtime = beta_index_mtime(market_ticker) if uses_defaults else None
+if index_mtime is not None:
+    beta_index = cached_beta_index(market_ticker, index_mtime)
+if beta_index is not None and not beta_index.is_current():
+    st.caption(f"The beta index was last updated with {beta_index.as_of:%Y-%m-%d} data, "
+               "so a live comparison is shown instead.")
+    beta_index = None
+stock_sector = beta_index.sector_of(stock_ticker.upper()) if beta_index is not None else None
+
+if stock_sector is not None:
+    sectors = sorted(beta_index.constituents['Sector'].dropna().unique())
+    sector = st.selectbox("Sector", sectors, index=sectors.index(stock_sector))
+    sector_table = beta_index.sector(sector)
+    st.bar_chart(sector_table['beta'])
+    st.write(f"**Closest peers of {stock_ticker} by beta**")
+    peers = beta_index.peers(stock_ticker.upper())
+    st.dataframe(peers[['Name', 'beta', 'alpha', 'rolling_beta']].round(3), use_container_width=True)
+else:
+    sector_tickers = ["AAPL", "MSFT", "GOOGL", "AMZN", "META"]  # Example tech sector stocks
+    sector_betas = {}
+
+    for ticker in sector_tickers:
+        ticker_capm = precomputed_capm(ticker)
+        if ticker_capm is not None:
+            sector_betas[ticker] = ticker_capm['beta']
+            continue
+        with trace('fetch.download'):
+            stock_data = provider.download(ticker, start=start_date, end=end_date)
+        stock_data["Return"] = stock_data["Adj Close"].pct_change() if "Adj Close" in stock_data.columns else stock_data["Close"].pct_change()
+        data_comp = pd.merge(stock_data["Return"], market_data["Market Return"], left_index=True, right_index=True).dropna()
+        
+        if not data_comp.empty:
+            model_comp = fit_ols(data_comp["Return"], data_comp["Market Return"])
+            sector_betas[ticker] = model_comp.params.iloc[1]
+
+    st.bar_chart(pd.Series(sector_betas))
 
 # Risk-Adjusted Performance (Sharpe Ratio)
 st.subheader("Sharpe Ratio")
 
 risk_free_rate = st.number_input("Risk-Free Rate (%)", min_value=0.0, max_value=10.0, value=2.0) / 100
-excess_return = data["Stock Return"].mean() - risk_free_rate
-volatility = data["Stock Return"].std()
+if stock_capm is not None:
+    excess_return = stock_capm['sharpe_inputs']['mean'] - risk_free_rate
+    volatility = stock_capm['sharpe_inputs']['std']
+else:
+    excess_return = data["Stock Return"].mean() - risk_free_rate
+    volatility = data["Stock Return"].std()
 
 sharpe_ratio = excess_return / volatility
 st.subheader(f"Sharpe Ratio: **{round(sharpe_ratio, 3)}**")
 
 # Show Regression Summary
 with st.expander("View Regression Summary"):
+    if model is None:
+        with trace('capm_beta.ols'):
+            model = fit_ols(data["Stock Return"], data["Market Return"])
     st.text(model.summary())
 
 # Interpretation
@@ -152,3 +223,5 @@ st.write("🔹 **Beta ≈ 1:** Stock moves similarly to the market.")
 st.write("🔹 **Alpha > 0:** Stock outperforms the market.")
 st.write("🔹 **Alpha < 0:** Stock underperforms the market.")
 st.write("🔹 **Sharpe Ratio > 1:** Indicates a good risk-adjusted return.")
+
+render_trace_panel()
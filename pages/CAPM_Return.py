@@ -1,16 +1,24 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import datetime
 import numpy as np
-import plotly.express as px
 import capm_functions
+from pages.utils.price_panel import PricePanel
+from pages.utils.monte_carlo import log_returns, portfolio_log_returns, simulate, var_cvar
+from pages.utils.data_provider import get_provider
+from pages.utils.export import export_button
+from pages.utils.paged_table import paged_table
+from pages.utils.tracing import trace, start_render, render_trace_panel
 
 st.set_page_config(page_title="CAPM", 
                    page_icon="📈", 
                    layout="wide")
 
 st.title("Capital Asset Pricing Model")
+start_render("CAPM_Return")
+
+# Monte Carlo simulation cached on its inputs, so reruns with the same stocks and window reuse the paths
+cached_simulate = st.cache_data(max_entries=32, show_spinner="Simulating paths...")(simulate)
 
 # Sidebar Information
 st.sidebar.header("About the CAPM Calculator")
@@ -55,29 +63,29 @@ with col2:
 
 try:
     # Downloading data for S&P 500
+    provider = get_provider()
     end = datetime.date.today()
     start = datetime.date(end.year - year, end.month, end.day)
-    SP500 = yf.download('^GSPC', start=start, end=end)['Close'].reset_index()
+    with trace('fetch.download'):
+        SP500 = provider.download('^GSPC', start=start, end=end)['Close'].reset_index()
     SP500.columns = ['Date', 'SP500']
 
     stocks_df = pd.DataFrame()
 
     for stock in stock_list:
-        data = yf.download(stock, start=start, end=end)
+        with trace('fetch.download'):
+            data = provider.download(stock, start=start, end=end)
         stocks_df[stock] = data['Close']
 
     stocks_df.reset_index(inplace=True)
     stocks_df.loc[:, 'Date'] = pd.to_datetime(stocks_df['Date'])
     stocks_df = pd.merge(stocks_df, SP500, on='Date', how='inner')
+    # Compact float32 panel used for the normalisation, return, beta and correlation math
+    prices = PricePanel.from_frame(stocks_df)
 
-    # Display dataframe for analysis
-    col1, col2 = st.columns([1, 1])
-    with col1:
-        st.markdown('### DataFrame Head')
-        st.dataframe(stocks_df.head(), use_container_width=True)
-    with col2:
-        st.markdown('### DataFrame Tail')
-        st.dataframe(stocks_df.tail(), use_container_width=True)
+    # Display dataframe for analysis, one page at a time
+    st.markdown('### Price Data')
+    paged_table(stocks_df.set_index('Date'), key='prices_page')
 
     # Visualizations
     col1, col2 = st.columns([1,1])
@@ -86,9 +94,9 @@ try:
         st.plotly_chart(capm_functions.interactive_plot(stocks_df))
     with col2:
         st.markdown('### Normalized Stock Prices')
-        st.plotly_chart(capm_functions.interactive_plot(capm_functions.normalize(stocks_df)))
+        st.plotly_chart(capm_functions.interactive_plot(capm_functions.normalize(prices).to_frame(date_column=True)))
 
-    stock_daily_return = capm_functions.daily_return(stocks_df)
+    stock_daily_return = capm_functions.daily_return(prices)
     
     # Calculate beta and alpha
     beta = {}
@@ -143,8 +151,29 @@ try:
     st.markdown('### Volatility of Stocks')
     st.bar_chart(volatility_df.set_index('Stock')['Volatility'])
 
-    # Download data as CSV
-    st.download_button("Download Data", stocks_df.to_csv(index=False), "stocks_data.csv", "text/csv")
+    # Equal-weighted portfolio risk: historical and Monte Carlo VaR/CVaR
+    st.markdown('### Portfolio Risk (Equal-Weighted)')
+    level = st.radio("Confidence level", [0.95, 0.99], format_func=lambda l: f"{l:.0%}", horizontal=True)
+    asset_returns = log_returns(stocks_df[stock_list])
+    weights = np.full(len(stock_list), 1 / len(stock_list))
+    hist_var, hist_cvar = var_cvar(np.expm1(portfolio_log_returns(asset_returns, weights)), level=level)
+
+    risk_cols = st.columns(4)
+    risk_cols[0].metric("Historical 1-Day VaR", f"{hist_var:.2%}")
+    risk_cols[1].metric("Historical 1-Day CVaR", f"{hist_cvar:.2%}")
+    # The 50,000 paths are only simulated when asked for
+    if st.toggle("Simulate 30-day portfolio paths", key='simulate_portfolio'):
+        # Bootstrapping whole days keeps the correlation between the stocks
+        simulation = cached_simulate(asset_returns, horizon=30, n_paths=50_000, weights=weights)
+        sim_var, sim_cvar = var_cvar(simulation['terminal_returns'], level=level)
+        risk_cols[2].metric("Simulated 30-Day VaR", f"{sim_var:.2%}")
+        risk_cols[3].metric("Simulated 30-Day CVaR", f"{sim_cvar:.2%}")
+        st.line_chart(simulation['quantiles'].rename(columns=lambda q: f"{q:.0%}"))
+
+    # Download data; the export file is generated on click and cached by content
+    export_button("Download Data", stocks_df, "stocks_data", key='stocks_data_export', index=False)
 
 except Exception as e:
     st.write(f'Error: {e}')
+
+render_trace_panel()
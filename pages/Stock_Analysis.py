@@ -1,17 +1,15 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import plotly.graph_objects as go
 import datetime
-import ta
-import numpy as np
-
-# Monkey patch: ensure np.NaN exists (fix for pandas_ta compatibility with latest NumPy)
-if not hasattr(np, 'NaN'):
-    np.NaN = np.nan
-
 from pages.utils.plotly_figure import plotly_table, close_chart, candlestick, RSI, MACD, Moving_average_forecast
-import plotly.io as pio
+from pages.utils.price_pyramid import update_pyramid
+from pages.utils.figure_cache import get_figure_cache
+from pages.utils.export import export_button
+from pages.utils.paged_table import paged_table
+from pages.utils.tracing import trace, start_render, render_trace_panel
+from pages.utils.data_provider import get_provider
+from pages.utils.local_store import ticker_key
 
 # Setting page configuration
 st.set_page_config(
@@ -21,6 +19,7 @@ st.set_page_config(
 )
 
 st.title("Stock Analysis")
+start_render("Stock_Analysis")
 
 # Sidebar for app information
 st.sidebar.title("About the App")
@@ -60,17 +59,26 @@ with col2:
 with col3:
     end_date = st.date_input("Choose End Date", today)
 
+# The ticker names files in the local price store, so only plain symbols are accepted
+try:
+    ticker_input = ticker_key(ticker_input)
+except ValueError:
+    st.error("Error: Please enter a valid ticker symbol (letters, digits and . ^ = -).")
+    st.stop()
+
 st.subheader(ticker_input)
 
-# Fetch stock data using yfinance
-stock = yf.Ticker(ticker_input)
+# Fetch stock data through the configured market data provider
+provider = get_provider()
+with trace('fetch.info'):
+    stock_info = provider.info(ticker_input)
 
 # Display company information if available
-if "longBusinessSummary" in stock.info:
-    st.write(stock.info["longBusinessSummary"])
-st.write("**Sector:**", stock.info.get("sector", "N/A"))
-st.write("**Full Time Employees:**", stock.info.get("fullTimeEmployees", "N/A"))
-st.write("**Website:**", stock.info.get("website", "N/A"))
+if "longBusinessSummary" in stock_info:
+    st.write(stock_info["longBusinessSummary"])
+st.write("**Sector:**", stock_info.get("sector", "N/A"))
+st.write("**Full Time Employees:**", stock_info.get("fullTimeEmployees", "N/A"))
+st.write("**Website:**", stock_info.get("website", "N/A"))
 
 col1, col2 = st.columns(2)
 
@@ -78,10 +86,10 @@ with col1:
     # Create DataFrame for key stock data
     df = pd.DataFrame(index=['Market Cap', 'Beta', 'EPS', 'PE Ratio'])
     df[''] = [
-        stock.info.get("marketCap", "N/A"),
-        stock.info.get("beta", "N/A"),
-        stock.info.get("trailingEps", "N/A"),
-        stock.info.get("trailingPE", "N/A")
+        stock_info.get("marketCap", "N/A"),
+        stock_info.get("beta", "N/A"),
+        stock_info.get("trailingEps", "N/A"),
+        stock_info.get("trailingPE", "N/A")
     ]
     fig = plotly_table(df)
     st.plotly_chart(fig, use_container_width=True)
@@ -90,23 +98,25 @@ with col2:
     # Create DataFrame for additional stock data
     df = pd.DataFrame(index=['Quick Ratio', 'Revenue per share', 'Profit Margins', 'Debt to Equity', 'Return on Equity'])
     df[''] = [
-        stock.info.get("quickRatio", "N/A"),
-        stock.info.get("revenuePerShare", "N/A"),
-        stock.info.get("profitMargins", "N/A"),
-        stock.info.get("debtToEquity", "N/A"),
-        stock.info.get("returnOnEquity", "N/A")
+        stock_info.get("quickRatio", "N/A"),
+        stock_info.get("revenuePerShare", "N/A"),
+        stock_info.get("profitMargins", "N/A"),
+        stock_info.get("debtToEquity", "N/A"),
+        stock_info.get("returnOnEquity", "N/A")
     ]
     fig = plotly_table(df)
     st.plotly_chart(fig, use_container_width=True)
 
 # Display dividend information if available
-if not stock.dividends.empty:
+with trace('fetch.dividends'):
+    dividend_data = provider.dividends(ticker_input)
+if not dividend_data.empty:
     st.subheader('Dividends')
-    dividend_data = stock.dividends
-    st.write(dividend_data)
+    paged_table(dividend_data.sort_index(ascending=False).to_frame('Dividends'), key='dividends_page', decimals=4)
 
 # Download historical stock data
-data = yf.download(ticker_input, start=start_date, end=end_date)
+with trace('fetch.download'):
+    data = provider.download(ticker_input, start=start_date, end=end_date)
 
 col1, col2, col3 = st.columns(3)
 # Calculate last close price and daily change
@@ -114,14 +124,13 @@ last_close_price = data['Close'].iloc[-1].item()
 daily_change_value = (data['Close'].iloc[-1] - data['Close'].iloc[-2]).item()
 col1.metric("Daily Change", str(round(last_close_price, 2)), str(round(daily_change_value, 2)))
 
-# Display last 10 days of historical data as a table
-last_10_df = data.tail(10).sort_index(ascending=False).round(3)
-if isinstance(last_10_df.columns, pd.MultiIndex):
-    last_10_df.columns = [' '.join(col).strip() for col in last_10_df.columns.values]
-last_10_df.columns = last_10_df.columns.str.replace(ticker_input, '', regex=False)
-fig = plotly_table(last_10_df)
-st.write('##### Historical Data (Last 10 days)')
-st.plotly_chart(fig, use_container_width=True)
+# Display historical data as a paginated table, newest 10 days first
+history_df = data.iloc[::-1]
+if isinstance(history_df.columns, pd.MultiIndex):
+    history_df = history_df.set_axis([' '.join(col).strip() for col in history_df.columns.values], axis=1)
+history_df = history_df.set_axis(history_df.columns.str.replace(ticker_input, '', regex=False), axis=1)
+st.write('##### Historical Data')
+paged_table(history_df, key='history_page', decimals=3)
 
 # Buttons for selecting time period
 col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
@@ -159,40 +168,41 @@ with col2:
         indicators = st.selectbox('Indicators', ['RSI', 'Moving Average', 'MACD'])
 
 # Get full history for charting
-stock_data = yf.Ticker(ticker_input)
-new_df1 = stock_data.history(period='max')
-data1 = stock_data.history(period='max')
-
-if num_period == '':
-    if chart_type == 'Candle' and indicators == 'RSI':
-        st.plotly_chart(candlestick(data1, '1y'), use_container_width=True)
-        st.plotly_chart(RSI(data1, '1y'), use_container_width=True)
-    if chart_type == 'Candle' and indicators == 'MACD':
-        st.plotly_chart(candlestick(data1, '1y'), use_container_width=True)
-        st.plotly_chart(MACD(data1, '1y'), use_container_width=True)
-    if chart_type == 'Line' and indicators == 'RSI':
-        st.plotly_chart(close_chart(data1, '1y'), use_container_width=True)
-        st.plotly_chart(RSI(data1, '1y'), use_container_width=True)
-    if chart_type == 'Line' and indicators == 'Moving Average':
-        st.plotly_chart(Moving_average_forecast(data1), use_container_width=True)
-    if chart_type == 'Line' and indicators == 'MACD':
-        st.plotly_chart(close_chart(data1, '1y'), use_container_width=True)
-        st.plotly_chart(MACD(data1, '1y'), use_container_width=True)
+with trace('fetch.history'):
+    data1 = provider.history(ticker_input, period='max')
+# Daily/weekly/monthly bars so long periods are drawn at a readable resolution
+with trace('price_pyramid.update'):
+    pyramid = update_pyramid(ticker_input, data1)
+
+# Serve unchanged charts from the shared figure cache instead of rebuilding them
+figure_cache = get_figure_cache()
+chart_period = num_period if num_period else '1y'
+last_bar = (data1.index[-1], data1['Close'].iloc[-1])
+
+# Charts that do not depend on the period are cached with period=None
+def cached_chart(chart_name, builder, period=chart_period):
+    key = (ticker_input, period, chart_name, last_bar)
+    with trace(f'chart.{chart_name}'):
+        st.plotly_chart(figure_cache.get_or_build(key, builder), use_container_width=True)
+
+if chart_type == 'Line' and indicators == 'Moving Average':
+    cached_chart('Moving Average', lambda: Moving_average_forecast(data1), period=None)
 else:
-    if chart_type == 'Candle' and indicators == 'RSI':
-        st.plotly_chart(candlestick(new_df1, num_period), use_container_width=True)
-        st.plotly_chart(RSI(new_df1, num_period), use_container_width=True)
-    if chart_type == 'Candle' and indicators == 'MACD':
-        st.plotly_chart(candlestick(new_df1, num_period), use_container_width=True)
-        st.plotly_chart(MACD(new_df1, num_period), use_container_width=True)
-    if chart_type == 'Line' and indicators == 'RSI':
-        st.plotly_chart(close_chart(new_df1, num_period), use_container_width=True)
-        st.plotly_chart(RSI(new_df1, num_period), use_container_width=True)
-    if chart_type == 'Line' and indicators == 'Moving Average':
-        st.plotly_chart(Moving_average_forecast(new_df1), use_container_width=True)
-    if chart_type == 'Line' and indicators == 'MACD':
-        st.plotly_chart(close_chart(new_df1, num_period), use_container_width=True)
-        st.plotly_chart(MACD(new_df1, num_period), use_container_width=True)
+    if chart_type == 'Candle':
+        cached_chart('Candle', lambda: candlestick(data1, chart_period, pyramid=pyramid))
+    else:
+        cached_chart('Line', lambda: close_chart(data1, chart_period, pyramid=pyramid))
+    if indicators == 'RSI':
+        cached_chart('RSI', lambda: RSI(data1, chart_period))
+    if indicators == 'MACD':
+        cached_chart('MACD', lambda: MACD(data1, chart_period))
+
+cache_stats = figure_cache.stats()
+st.sidebar.subheader("Chart Cache")
+st.sidebar.write(
+    f"Hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} hits, {cache_stats['misses']} misses) · "
+    f"Saved: {cache_stats['seconds_saved']:.1f} s of chart building"
+)
 
 # Volatility Analysis
 st.subheader("Volatility Analysis")
@@ -237,11 +247,7 @@ elif returns_period == '1Y':
     else:
         st.write("Not enough data for 1-year return.")
 
-# Download button for CSV export
-csv_data = data.to_csv(index=True)
-st.download_button(
-    label="Download Stock Data as CSV",
-    data=csv_data,
-    file_name=f"{ticker_input}_stock_data.csv",
-    mime="text/csv",
-)
+# Download button; the export file is generated on click and cached by content
+export_button("Download Stock Data", data, f"{ticker_input}_stock_data", key='stock_data_export')
+
+render_trace_panel()
@@ -1,9 +1,14 @@
 import streamlit as st
 import pandas as pd
-from pages.utils.model_train import (
-    get_data, get_rolling_mean, get_differencing_order, scaling, evaluate_model, get_forecast, inverse_scaling
-)
-from pages.utils.plotly_figure import plotly_table, Moving_average_forecast
+import uuid
+from pages.utils.model_train import get_data, get_rolling_mean
+from pages.utils.fit_service import get_fit_service, FitServiceBusy
+from pages.utils.precompute import load_precomputed
+from pages.utils.monte_carlo import log_returns, simulate, var_cvar, historical_var
+from pages.utils.plotly_figure import Moving_average_forecast, forecast_fan_chart
+from pages.utils.export import export_button
+from pages.utils.paged_table import paged_table
+from pages.utils.tracing import start_render, render_trace_panel
 import numpy as np
 np.isnan(np.nan) # returns True
 # Streamlit page configuration
@@ -14,14 +19,49 @@ st.set_page_config(
 )
 
 st.title("Stock Prediction Dashboard")
+start_render("Stock_Prediction")
+
+# Identifies this browser session to the fitting service so stale fits can be cancelled
+if 'fit_session' not in st.session_state:
+    st.session_state['fit_session'] = uuid.uuid4().hex
+
+# Poll a running fit and rerun the page once the fresh forecast is ready
+@st.fragment(run_every=1.0)
+def fit_progress(job):
+    if job.finished:
+        st.rerun()
+    st.progress(job.progress, text=f"{job.stage}...")
+
+# Monte Carlo simulation cached on its inputs (returns, start price, paths, method, drift),
+# so reruns and other sessions looking at the same ticker reuse the paths
+cached_simulate = st.cache_data(max_entries=32, show_spinner="Simulating paths...")(simulate)
+
+# Render the RMSE, forecast table, chart and download for a finished fit
+def show_forecast(result):
+    st.write("**Model RMSE Score:**", result['rmse'])
+
+    forecast = result['forecast']
+    st.write('##### Forecast Data (Next 30 Days)')
+
+    # Display forecast data in a table
+    paged_table(forecast.sort_index(ascending=True), key='forecast_page', decimals=3)
+
+    # Combine historical and forecasted data
+    forecast = pd.concat([result['rolling_price'], forecast])
+    st.plotly_chart(Moving_average_forecast(forecast.iloc[150:]), use_container_width=True)
 
+    # Download Button for Forecast Data
+    export_button("Download Forecast Data", forecast, "forecast", key='forecast_export')
+    return result
 
 # User Input Section
 col1, col2, col3 = st.columns(3)
 
 with col1:
     ticker = st.text_input('Stock Ticker', 'AAPL')
-    rmse = None  # Changed from 0 to None for better error handling
+with col2:
+    engine_label = st.selectbox('Forecasting Engine', ['ARIMA', 'Holt'])
+    engine = engine_label.lower()
 
 st.subheader(f'Predicting Next 30 Days Close Price for: {ticker}')
 
@@ -31,32 +71,96 @@ close_price = get_data(ticker)
 if close_price is None or close_price.empty:
     st.error("Error: Could not retrieve stock data. Please check the ticker symbol.")
 else:
-    # Data processing and model evaluation
-    rolling_price = get_rolling_mean(close_price)
-    differencing_order = get_differencing_order(rolling_price)
-    scaled_data, scaler = scaling(rolling_price)
-    rmse = evaluate_model(scaled_data, differencing_order)
+    # A nightly precomputed forecast for this exact bar is served without refitting
+    precomputed = load_precomputed(ticker)
+    # Nightly forecasts are fitted with ARIMA only
+    precomputed_forecast = precomputed.get('forecast') if precomputed and engine == 'arima' else None
+    shown_forecast = None
+    if precomputed_forecast is not None and precomputed_forecast['as_of'] == close_price.index[-1]:
+        shown_forecast = show_forecast(precomputed_forecast)
+    else:
+        # The fit runs in the background; show the last known forecast until the fresh one lands
+        fit_service = get_fit_service()
+        try:
+            job = fit_service.submit(st.session_state['fit_session'], ticker, close_price, engine)
+        except FitServiceBusy:
+            job = None
+            st.warning("The forecasting service is busy. Showing the last available forecast.")
 
-    st.write("**Model RMSE Score:**", rmse)
+        if job is not None and job.finished and job.error is not None:
+            st.error(f"Error: Could not fit the model ({job.error}).")
+        elif job is not None and job.result is not None:
+            shown_forecast = show_forecast(job.result)
+        else:
+            if job is not None:
+                fit_progress(job)
+            last_known = fit_service.latest(ticker, engine) or precomputed_forecast
+            if last_known is not None:
+                st.caption(f"Showing the forecast from {last_known['as_of']:%Y-%m-%d} while the model is refitted.")
+                shown_forecast = show_forecast(last_known)
 
-    # Forecasting
-    forecast = get_forecast(scaled_data, differencing_order)
-    forecast['Close'] = inverse_scaling(scaler, forecast['Close'])
-
-    st.write('##### Forecast Data (Next 30 Days)')
+    # Monte Carlo paths and tail risk over the same 30-day horizon as the forecast
+    with st.expander("Monte Carlo Risk Analysis"):
+        methods = ['Bootstrap', 'GBM'] + (['Forecast Model'] if shown_forecast is not None else [])
+        mc_col1, mc_col2, mc_col3 = st.columns(3)
+        with mc_col1:
+            method = st.selectbox("Simulation method", methods)
+        with mc_col2:
+            n_paths = st.select_slider("Number of paths", [10_000, 25_000, 50_000, 100_000], value=50_000)
+        with mc_col3:
+            level = st.radio("Confidence level", [0.95, 0.99], format_func=lambda l: f"{l:.0%}", horizontal=True)
 
-    # Display forecast data in a table
-    fig_tail = plotly_table(forecast.sort_index(ascending=True).round(3))
-    fig_tail.update_layout(height=220)
-    st.plotly_chart(fig_tail, use_container_width=True)
+        prices = close_price.to_numpy().reshape(-1)
+        hist_var, hist_cvar = historical_var(prices, horizon=1, level=level)
+        risk_cols = st.columns(4)
+        risk_cols[0].metric("Historical 1-Day VaR", f"{hist_var:.2%}")
+        risk_cols[1].metric("Historical 1-Day CVaR", f"{hist_cvar:.2%}")
 
-    # Combine historical and forecasted data
-    forecast = pd.concat([rolling_price, forecast])
-    st.plotly_chart(Moving_average_forecast(forecast.iloc[150:]), use_container_width=True)
+        # The paths are only simulated when asked for
+        if st.toggle("Simulate paths", key='simulate_paths'):
+            drift = None
+            if method == 'Forecast Model':
+                # Centre the bootstrapped paths on the model's forecast instead of the historical drift
+                path = np.concatenate([[shown_forecast['rolling_price'].to_numpy().reshape(-1)[-1]],
+                                       shown_forecast['forecast'].to_numpy().reshape(-1)])
+                drift = np.diff(np.log(path))
+            simulation = cached_simulate(
+                log_returns(prices), start_price=prices[-1], horizon=30, n_paths=n_paths,
+                method='gbm' if method == 'GBM' else 'bootstrap', drift=drift
+            )
+            sim_var, sim_cvar = var_cvar(simulation['terminal_returns'], level=level)
+            risk_cols[2].metric("Simulated 30-Day VaR", f"{sim_var:.2%}")
+            risk_cols[3].metric("Simulated 30-Day CVaR", f"{sim_cvar:.2%}")
+            st.plotly_chart(forecast_fan_chart(close_price.iloc[-120:, 0], simulation['quantiles']),
+                            use_container_width=True)
 
-    # Download Button for Forecast Data
-    csv = forecast.to_csv(index=True)
-    st.download_button("Download Forecast Data", csv, "forecast.csv", "text/csv")
+    # Walk-forward backtest: score the engine on many rolling 30-day holdouts instead of one
+    with st.expander("Walk-forward Backtest"):
+        bt_col1, bt_col2 = st.columns(2)
+        with bt_col1:
+            n_folds = st.slider("Number of folds", min_value=2, max_value=20, value=8)
+        with bt_col2:
+            window = st.radio("Training window", ['Expanding', 'Sliding'], horizontal=True)
+        # The backtest runs as a bounded job on the fit service; the page polls it like a forecast fit
+        if st.button("Run Backtest"):
+            try:
+                st.session_state['backtest_job'] = get_fit_service().submit_backtest(
+                    ticker, get_rolling_mean(close_price), engine, n_folds, window.lower())
+            except FitServiceBusy:
+                st.warning("The forecasting service is busy. Please run the backtest again shortly.")
+        backtest_job = st.session_state.get('backtest_job')
+        if backtest_job is not None and backtest_job.key[1:5] == (ticker, engine, n_folds, window.lower()):
+            if not backtest_job.finished:
+                fit_progress(backtest_job)
+            elif backtest_job.error is not None:
+                st.error(f"Error: Could not run the backtest ({backtest_job.error}).")
+            else:
+                folds, summary = backtest_job.result
+                metric_cols = st.columns(3)
+                metric_cols[0].metric("Mean RMSE", f"{summary['rmse']:.2f}")
+                metric_cols[1].metric("Mean MAPE", f"{summary['mape']:.2f}%")
+                metric_cols[2].metric("Directional Accuracy", f"{summary['directional_accuracy']:.0%}")
+                st.dataframe(folds.round(3), use_container_width=True)
 
 # Information about the code
 st.sidebar.subheader("About This App")
@@ -64,3 +168,5 @@ st.sidebar.markdown("This Streamlit app predicts stock prices for the next 30 da
 st.sidebar.markdown("It uses rolling mean, differencing order, and scaling for data preprocessing before training the model.")
 st.sidebar.markdown("The model's RMSE score is displayed for evaluation, and forecasted results are visualized using interactive plots.")
 st.sidebar.markdown("Additional features like downloading forecast data and customizing prediction periods are available in the sidebar.")
+
+render_trace_panel()
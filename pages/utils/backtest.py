@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pages.utils.model_train import fit_model_params, get_differencing_order, scaling, inverse_scaling
+
+# Forecast horizon of model_train.fit_model, which every fold is scored on
+HORIZON = 30
+
+# Consecutive folds fitted together in one block; each fold in a block warm-starts from the
+# previous one. Fixed, so the scores do not depend on how many workers run the blocks.
+FOLDS_PER_BLOCK = 2
+
+# Train/test cuts for a walk-forward backtest over `length` observations.
+# Test blocks are HORIZON long and end at the last observation; each step moves the cut
+# back by `step`. 'expanding' trains on everything before the cut, 'sliding' on the last
+# `train_size` observations only.
+def make_folds(length, n_folds=8, step=HORIZON, window='expanding', train_size=250, min_train=100):
+    if window not in ('expanding', 'sliding'):
+        raise ValueError(f"Unknown window: {window}")
+    folds = []
+    for i in reversed(range(n_folds)):
+        cut = length - HORIZON - i * step
+        start = 0 if window == 'expanding' else max(0, cut - train_size)
+        if cut - start >= min_train:
+            folds.append((start, cut))
+    return folds
+
+# RMSE, MAPE and directional accuracy of one fold's forecast
+def score_fold(train, actual, predictions):
+    actual = np.asarray(actual, dtype=float)
+    predictions = np.asarray(predictions, dtype=float)
+    errors = actual - predictions
+    # Direction of each day's move, starting from the last training value
+    actual_moves = np.sign(np.diff(np.concatenate([[train[-1]], actual])))
+    predicted_moves = np.sign(np.diff(np.concatenate([[train[-1]], predictions])))
+    return {
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mape': float(np.mean(np.abs(errors / actual)) * 100),
+        'directional_accuracy': float(np.mean(actual_moves == predicted_moves)),
+    }
+
+# Fit a contiguous block of folds in order. Like the production forecast, each fold is
+# standardised before fitting, but with a scaler fitted on its training part only, and
+# scored in price units. The first fold of a block is fitted cold; the next ones reuse the
+# previous fold's parameters as warm-start values (ARIMA only when the differencing order
+# is unchanged, since the order sets which parameters the model has).
+def run_folds(series, folds, engine):
+    results = []
+    previous_params, previous_order = None, None
+    for start, cut in folds:
+        train, actual = series[start:cut], series[cut:cut + HORIZON]
+        # Holt does not use the differencing order, so the ADF search is skipped for it
+        differencing_order = get_differencing_order(pd.Series(train)) if engine == 'arima' else 0
+        warm_start = previous_params if differencing_order == previous_order else None
+        scaled_train, scaler = scaling(train)
+        predictions, previous_params = fit_model_params(
+            scaled_train.ravel(), differencing_order, engine, warm_start=warm_start)
+        previous_order = differencing_order
+        predictions = inverse_scaling(scaler, predictions).ravel()
+        result = score_fold(train, actual, predictions[:len(actual)])
+        result.update({'train_start': start, 'cut': cut, 'warm_start': warm_start is not None})
+        if engine == 'arima':
+            result['differencing_order'] = differencing_order
+        results.append(result)
+    return results
+
+# Walk-forward backtest of a model_train engine on a price series.
+# Folds are split into blocks of FOLDS_PER_BLOCK, and the blocks run in parallel on up to
+# `workers` processes (or on `executor`).
+# `progress`, if given, is called with the fraction of blocks finished.
+# Returns (per-fold DataFrame, aggregate metrics dict).
+def walk_forward(prices, engine='arima', n_folds=8, window='expanding', step=HORIZON,
+                 train_size=250, workers=4, executor=None, progress=None):
+    series = np.asarray(prices, dtype=float).reshape(-1)
+    folds = make_folds(len(series), n_folds, step, window, train_size)
+    if not folds:
+        raise ValueError("Not enough history for a single fold")
+    blocks = [folds[i:i + FOLDS_PER_BLOCK] for i in range(0, len(folds), FOLDS_PER_BLOCK)]
+
+    if executor is None:
+        with ProcessPoolExecutor(min(workers, len(blocks))) as pool:
+            block_results = list(pool.map(run_folds, [series] * len(blocks), blocks, [engine] * len(blocks)))
+    else:
+        futures = [executor.submit(run_folds, series, block, engine) for block in blocks]
+        block_results = []
+        for future in futures:
+            block_results.append(future.result())
+            if progress is not None:
+                progress(len(block_results) / len(futures))
+
+    fold_results = pd.DataFrame([result for block in block_results for result in block])
+    fold_results.index = pd.RangeIndex(1, len(fold_results) + 1, name='Fold')
+    aggregate = {
+        'folds': len(fold_results),
+        'rmse': float(fold_results['rmse'].mean()),
+        'pooled_rmse': float(np.sqrt((fold_results['rmse'] ** 2).mean())),
+        'mape': float(fold_results['mape'].mean()),
+        'directional_accuracy': float(fold_results['directional_accuracy'].mean()),
+    }
+    return fold_results, aggregate
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# Holt's linear-trend exponential smoothing, fitted for many series at once.
+#
+# Series are the columns of a (time x tickers) matrix. Every (alpha, beta) pair
+# on a small grid is run over all tickers in one pass of the recursion, as
+# (grid x tickers) arrays. Each ticker keeps the pair with the lowest one-step
+# squared error. The cost is O(time x grid x tickers) vectorised NumPy work,
+# with no per-series optimiser loop.
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+BETAS = np.array([0.01, 0.05, 0.1, 0.2, 0.3])
+
+# Fill gaps (e.g. before a listing date) so every column is a complete series
+def _as_matrix(data):
+    matrix = np.asarray(data, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+    if np.isnan(matrix).any():
+        matrix = pd.DataFrame(matrix).ffill().bfill().to_numpy()
+    if matrix.shape[0] < 3:
+        raise ValueError("Holt smoothing needs at least 3 observations per series")
+    return matrix
+
+# Run the recursion for arrays of smoothing parameters broadcast against the tickers
+def _smooth(matrix, alpha, beta):
+    level = np.broadcast_to(matrix[0], np.broadcast(alpha, matrix[0]).shape).copy()
+    trend = np.broadcast_to(matrix[1] - matrix[0], level.shape).copy()
+    sse = np.zeros(level.shape)
+    for y in matrix[1:]:
+        predicted = level + trend
+        error = y - predicted
+        sse += error * error
+        new_level = predicted + alpha * error
+        trend = trend + alpha * beta * error
+        level = new_level
+    return level, trend, sse
+
+# Grid values within one step of the given values (the union over all tickers)
+def _neighbours(grid, values):
+    nearest = np.abs(grid.reshape(-1, 1) - np.ravel(values)).argmin(axis=0)
+    keep = np.clip(np.concatenate([nearest - 1, nearest, nearest + 1]), 0, len(grid) - 1)
+    return grid[np.unique(keep)]
+
+# Choose (alpha, beta) per ticker by grid search and return the fitted parameters and final state.
+# Pass `near` (the parameters of a previous fit) to search only the grid points next to them.
+def fit_holt(data, near=None):
+    matrix = _as_matrix(data)
+    alphas, betas = ALPHAS, BETAS
+    if near is not None:
+        alphas, betas = _neighbours(ALPHAS, near['alpha']), _neighbours(BETAS, near['beta'])
+    alpha_grid, beta_grid = np.meshgrid(alphas, betas, indexing='ij')
+    alpha_grid = alpha_grid.reshape(-1, 1)
+    beta_grid = beta_grid.reshape(-1, 1)
+    _, _, sse = _smooth(matrix, alpha_grid, beta_grid)
+    best = np.argmin(sse, axis=0)
+    alpha, beta = alpha_grid[best, 0], beta_grid[best, 0]
+    level, trend, _ = _smooth(matrix, alpha, beta)
+    return {'alpha': alpha, 'beta': beta, 'level': level, 'trend': trend}
+
+# Point forecasts for the next `horizon` steps, shape (horizon x tickers)
+def holt_forecast(data, horizon=30, near=None):
+    fitted = fit_holt(data, near)
+    steps = np.arange(1, horizon + 1).reshape(-1, 1)
+    return fitted['level'] + steps * fitted['trend'], fitted
+
+# Holdout RMSE per ticker: fit on all but the last `holdout` rows and score the forecast on them
+def holt_evaluate(data, holdout=30):
+    matrix = _as_matrix(data)
+    predictions, _ = holt_forecast(matrix[:-holdout], holdout)
+    return np.sqrt(np.mean((matrix[-holdout:] - predictions) ** 2, axis=0))
+
+# Forecasts and holdout RMSE for a whole (dates x tickers) price frame in one call
+def forecast_universe(prices, horizon=30, holdout=30):
+    forecast, _ = holt_forecast(prices.to_numpy(), horizon)
+    rmse = holt_evaluate(prices.to_numpy(), holdout)
+    forecast = pd.DataFrame(forecast, columns=prices.columns, index=pd.RangeIndex(1, horizon + 1, name='Step'))
+    return forecast, pd.Series(rmse, index=prices.columns, name='RMSE')
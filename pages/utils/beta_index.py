@@ -0,0 +1,287 @@
+import datetime
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from pages.utils.local_store import store_path, temp_path, ticker_key
+from pages.utils.precompute import MARKET_TICKER, ROLLING_WINDOW, is_current_as_of
+
+# Beta index: beta, alpha and rolling beta for every constituent of a benchmark, kept
+# current by appending each new trading day instead of refitting the whole window.
+#
+# Per ticker, the last BETA_WINDOW aligned (market, stock) daily returns sit in a ring
+# buffer, with the OLS sufficient statistics n, Σx, Σy, Σxx, Σxy kept for each window.
+# A new day adds its terms and subtracts those of the day leaving the window, so an
+# update is O(1). The sums are recomputed exactly from the buffer once per cycle so
+# rounding errors from the subtractions cannot build up.
+
+# One year of trading days, matching the default window of the CAPM Beta page
+BETA_WINDOW = 252
+
+# Constituents file: CSV with Symbol, Name and Sector columns (override with TRADING_APP_CONSTITUENTS)
+CONSTITUENTS_PATH = os.environ.get(
+    'TRADING_APP_CONSTITUENTS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'constituents.csv')
+)
+
+# Threads used to download constituent prices during a refresh
+FETCH_THREADS = 8
+
+# Sector given to constituents whose Sector is blank
+UNCLASSIFIED = 'Unclassified'
+
+# Constituents of the benchmark, indexed by symbol
+def load_constituents(path=CONSTITUENTS_PATH):
+    constituents = pd.read_csv(path, dtype=str)
+    constituents['Symbol'] = constituents['Symbol'].str.strip().str.upper()
+    constituents['Sector'] = constituents['Sector'].fillna('').str.strip().replace('', UNCLASSIFIED)
+    return constituents.drop_duplicates('Symbol').set_index('Symbol')
+
+# Simple daily returns from a yf.download-shaped frame
+def daily_returns(frame):
+    close = frame['Adj Close'] if 'Adj Close' in frame.columns else frame['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.pct_change()
+
+# Running OLS state of one ticker against the market
+class TickerBeta:
+    def __init__(self, windows=(BETA_WINDOW, ROLLING_WINDOW)):
+        self.windows = tuple(windows)
+        self.size = max(self.windows)
+        self.x = np.zeros(self.size)
+        self.y = np.zeros(self.size)
+        self.count = 0
+        self.last_date = None
+        # Row per window: n, Σx, Σy, Σxx, Σxy
+        self.sums = np.zeros((len(self.windows), 5))
+
+    # Add one trading day of (market return, stock return)
+    def append(self, date, x, y):
+        terms = np.array([1.0, x, y, x * x, x * y])
+        for i, window in enumerate(self.windows):
+            if self.count >= window:
+                old = (self.count - window) % self.size
+                ox, oy = self.x[old], self.y[old]
+                self.sums[i] -= (1.0, ox, oy, ox * ox, ox * oy)
+            self.sums[i] += terms
+        slot = self.count % self.size
+        self.x[slot], self.y[slot] = x, y
+        self.count += 1
+        self.last_date = date
+        if self.count % self.size == 0:
+            self._resync()
+
+    def _resync(self):
+        for i, window in enumerate(self.windows):
+            n = min(self.count, window)
+            slots = (self.count - n + np.arange(n)) % self.size
+            x, y = self.x[slots], self.y[slots]
+            self.sums[i] = (n, x.sum(), y.sum(), (x * x).sum(), (x * y).sum())
+
+    # Beta and alpha over the given window, NaN until the window has two days
+    def stats(self, window=BETA_WINDOW):
+        n, sx, sy, sxx, sxy = self.sums[self.windows.index(window)]
+        denominator = n * sxx - sx * sx
+        if n < 2 or denominator <= 0:
+            return np.nan, np.nan
+        beta = (n * sxy - sx * sy) / denominator
+        return beta, (sy - beta * sx) / n
+
+    @property
+    def days(self):
+        return min(self.count, self.size)
+
+    # Plain-data form that is stored on disk
+    def to_dict(self):
+        return {'windows': self.windows, 'x': self.x, 'y': self.y, 'count': self.count,
+                'last_date': self.last_date, 'sums': self.sums}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['windows'])
+        state.x, state.y, state.sums = data['x'], data['y'], data['sums']
+        state.count, state.last_date = data['count'], data['last_date']
+        return state
+
+# Beta index over the constituents of one benchmark
+class BetaIndex:
+    def __init__(self, constituents, market=MARKET_TICKER):
+        self.market = market
+        self.constituents = constituents
+        self.tickers = {}
+
+    # Append the trading days after the ticker's last update; returns the number of new days
+    def update(self, ticker, stock_returns, market_returns):
+        state = self.tickers.get(ticker)
+        aligned = pd.concat([market_returns, stock_returns], axis=1, join='inner').dropna()
+        if state is not None:
+            aligned = aligned[aligned.index > state.last_date]
+        if aligned.empty:
+            return 0
+        if state is None:
+            state = self.tickers[ticker] = TickerBeta()
+        for date, x, y in zip(aligned.index, aligned.iloc[:, 0].to_numpy(), aligned.iloc[:, 1].to_numpy()):
+            state.append(date, x, y)
+        return len(aligned)
+
+    # Beta, alpha, current rolling beta, window length and name/sector for every ticker in the index
+    def table(self):
+        rows = {}
+        for ticker, state in self.tickers.items():
+            beta, alpha = state.stats(BETA_WINDOW)
+            rows[ticker] = {
+                'beta': beta,
+                'alpha': alpha,
+                'rolling_beta': state.stats(ROLLING_WINDOW)[0] if state.count >= ROLLING_WINDOW else np.nan,
+                'days': state.days,
+                'as_of': state.last_date,
+            }
+        table = pd.DataFrame.from_dict(rows, orient='index')
+        return table.join(self.constituents[['Name', 'Sector']], how='left')
+
+    # Last trading day appended to the index, or None when it is empty
+    @property
+    def as_of(self):
+        if not self.tickers:
+            return None
+        return max(pd.Timestamp(state.last_date) for state in self.tickers.values()).date()
+
+    # True when no trading day has closed since the last day in the index
+    def is_current(self, today=None):
+        return self.as_of is not None and is_current_as_of(self.as_of, today)
+
+    # Sector the ticker belongs to, or None when it is not a constituent
+    def sector_of(self, ticker):
+        if ticker not in self.constituents.index:
+            return None
+        sector = self.constituents.at[ticker, 'Sector']
+        return UNCLASSIFIED if pd.isna(sector) else sector
+
+    # Constituents of one sector, highest beta first
+    def sector(self, sector):
+        table = self.table()
+        return table[table['Sector'] == sector].sort_values('beta', ascending=False)
+
+    # The n constituents of the same sector whose beta is closest to the ticker's
+    def peers(self, ticker, n=10):
+        table = self.table()
+        if ticker not in table.index:
+            return table.iloc[:0]
+        same_sector = table[(table['Sector'] == table.at[ticker, 'Sector']) & (table.index != ticker)]
+        same_sector = same_sector.dropna(subset=['beta'])
+        distance = (same_sector['beta'] - table.at[ticker, 'beta']).abs()
+        return same_sector.loc[distance.sort_values().index[:n]]
+
+    # Average beta per sector
+    def sector_summary(self):
+        return self.table().groupby('Sector')['beta'].agg(['mean', 'median', 'count']).sort_values('mean')
+
+    # Plain-data form that is stored on disk, so loading does not depend on the module the
+    # classes were pickled from (running this file with -m makes them __main__ classes)
+    def to_dict(self):
+        return {'market': self.market, 'constituents': self.constituents,
+                'tickers': {ticker: state.to_dict() for ticker, state in self.tickers.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(data['constituents'], data['market'])
+        index.tickers = {ticker: TickerBeta.from_dict(state) for ticker, state in data['tickers'].items()}
+        return index
+
+def _index_path(market):
+    return store_path('beta_index', f'{ticker_key(market)}.pkl')
+
+# Persist the index atomically
+def save_beta_index(index):
+    path = _index_path(index.market)
+    tmp_path = temp_path(path)
+    pd.to_pickle(index.to_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+# Modification time of the stored index, or None when it has not been built yet
+def beta_index_mtime(market=MARKET_TICKER):
+    try:
+        return os.path.getmtime(_index_path(market))
+    except OSError:
+        return None
+
+# Stored index for a benchmark, or None when it has not been built yet
+def load_beta_index(market=MARKET_TICKER):
+    path = _index_path(market)
+    if not os.path.exists(path):
+        return None
+    try:
+        return BetaIndex.from_dict(pd.read_pickle(path))
+    except (OSError, ValueError, EOFError, AttributeError, ImportError, KeyError, TypeError,
+            pickle.UnpicklingError):
+        return None
+
+# Bring the index up to date: new constituents are seeded with a year of history,
+# existing ones only download and append the days since their last update.
+# Returns (index, {ticker: error message} for tickers that could not be updated).
+def refresh_beta_index(provider, constituents_path=CONSTITUENTS_PATH, market=MARKET_TICKER, today=None):
+    today = today or datetime.date.today()
+    constituents = load_constituents(constituents_path)
+    index = load_beta_index(market) or BetaIndex(constituents, market)
+    index.constituents = constituents
+    # Tickers dropped from the constituents file leave the index
+    for ticker in set(index.tickers) - set(constituents.index):
+        del index.tickers[ticker]
+
+    # A short overlap before the last update gives the previous close for the first new return
+    seed_start = today - datetime.timedelta(days=BETA_WINDOW * 7 // 5 + 15)
+    def start_for(ticker):
+        state = index.tickers.get(ticker)
+        if state is None:
+            return seed_start
+        return max(pd.Timestamp(state.last_date).date() - datetime.timedelta(days=10), seed_start)
+
+    end = today + datetime.timedelta(days=1)
+    starts = {ticker: start_for(ticker) for ticker in constituents.index}
+    market_returns = daily_returns(provider.download(market, start=min(starts.values()), end=end)).rename('market')
+
+    def fetch(ticker):
+        return daily_returns(provider.download(ticker, start=starts[ticker], end=end)).rename(ticker)
+
+    failures = {}
+    with ThreadPoolExecutor(FETCH_THREADS) as pool:
+        futures = {ticker: pool.submit(fetch, ticker) for ticker in constituents.index}
+        for ticker, future in futures.items():
+            try:
+                index.update(ticker, future.result(), market_returns)
+            except Exception as e:
+                failures[ticker] = str(e)
+                continue
+            if ticker not in index.tickers:
+                failures[ticker] = 'no price data'
+    save_beta_index(index)
+    return index, failures
+
+# python -m pages.utils.beta_index refresh [--constituents constituents.csv]
+# python -m pages.utils.beta_index sector "Information Technology"
+# python -m pages.utils.beta_index peers AAPL
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Beta index over the benchmark constituents')
+    parser.add_argument('command', choices=['refresh', 'sectors', 'sector', 'peers'])
+    parser.add_argument('args', nargs='*', help='sector name or ticker')
+    parser.add_argument('--constituents', default=CONSTITUENTS_PATH)
+    parser.add_argument('--market', default=MARKET_TICKER)
+    args = parser.parse_args()
+    if args.command == 'refresh':
+        from pages.utils.data_provider import get_provider
+        index, failures = refresh_beta_index(get_provider(), args.constituents, args.market)
+        print(f"{len(index.tickers)} tickers in the {args.market} beta index, failed: {sorted(failures) or 'none'}")
+    else:
+        index = load_beta_index(args.market)
+        if index is None:
+            parser.error('the beta index has not been built yet; run the refresh command first')
+        if args.command == 'sectors':
+            print(index.sector_summary().round(3).to_string())
+        elif args.command == 'sector':
+            print(index.sector(' '.join(args.args)).round(3).to_string())
+        else:
+            print(index.peers(args.args[0].upper()).round(3).to_string())
@@ -0,0 +1,222 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from pages.utils.local_store import ticker_key
+
+# Backend selection: TRADING_APP_DATA_PROVIDER=yfinance (default) or replay
+PROVIDER_ENV = 'TRADING_APP_DATA_PROVIDER'
+FIXTURES_DIR = os.environ.get(
+    'TRADING_APP_FIXTURES',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'fixtures')
+)
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# The market data calls the pages make; every backend implements these four methods
+class MarketDataProvider:
+    # Daily OHLCV between start and end (end exclusive), shaped like yf.download
+    def download(self, ticker, start=None, end=None):
+        raise NotImplementedError
+
+    # Daily bars for a period ('5d', '1mo', '1y', 'ytd', 'max', ...), shaped like Ticker.history
+    def history(self, ticker, period='max'):
+        raise NotImplementedError
+
+    # Company information dict, like Ticker.info
+    def info(self, ticker):
+        raise NotImplementedError
+
+    # Dividend series, like Ticker.dividends
+    def dividends(self, ticker):
+        raise NotImplementedError
+
+# Live data from Yahoo Finance
+class YFinanceProvider(MarketDataProvider):
+    def download(self, ticker, start=None, end=None):
+        import yfinance as yf
+        return yf.download(ticker, start=start, end=end)
+
+    def history(self, ticker, period='max'):
+        import yfinance as yf
+        return yf.Ticker(ticker).history(period=period)
+
+    def info(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+    def dividends(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).dividends
+
+# Replays recorded fixtures from disk, optionally sleeping to imitate network latency.
+# Layout: <fixture_dir>/<TICKER>/history.parquet (or history.csv) and info.json
+class ReplayProvider(MarketDataProvider):
+    def __init__(self, fixture_dir=FIXTURES_DIR, latency=0.0, jitter=0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+
+    def _wait(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    # Path of a fixture file, or None when the ticker is not a plain symbol (it then has no data)
+    def _path(self, ticker, name):
+        try:
+            return os.path.join(self.fixture_dir, ticker_key(ticker), name)
+        except ValueError:
+            return None
+
+    def _info(self, ticker):
+        path = self._path(ticker, 'info.json')
+        if path is None or not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    # Full recorded history with a timezone-aware index, read once per ticker
+    @functools.lru_cache(maxsize=256)
+    def _history(self, ticker):
+        parquet_path = self._path(ticker, 'history.parquet')
+        csv_path = self._path(ticker, 'history.csv')
+        if parquet_path is not None and os.path.exists(parquet_path):
+            history = pd.read_parquet(parquet_path)
+        elif csv_path is not None and os.path.exists(csv_path):
+            history = pd.read_csv(csv_path, index_col=0)
+        else:
+            return pd.DataFrame(columns=OHLCV, index=pd.DatetimeIndex([], name='Date', tz='America/New_York'))
+        index = pd.DatetimeIndex(pd.to_datetime(history.index), name='Date')
+        if index.tz is None:
+            index = index.tz_localize(self._info(ticker).get('exchangeTimezoneName', 'America/New_York'))
+        history.index = index
+        return history
+
+    def download(self, ticker, start=None, end=None):
+        self._wait()
+        history = self._history(ticker)
+        bars = history[[col for col in OHLCV if col in history.columns]].copy()
+        bars.index = bars.index.tz_localize(None)
+        if start is not None:
+            bars = bars[bars.index >= pd.Timestamp(start)]
+        if end is not None:
+            bars = bars[bars.index < pd.Timestamp(end)]
+        # yfinance returns (Price, Ticker) columns sorted by price field
+        bars = bars[sorted(bars.columns)]
+        bars.columns = pd.MultiIndex.from_product([bars.columns, [ticker]], names=['Price', 'Ticker'])
+        return bars
+
+    def history(self, ticker, period='max'):
+        self._wait()
+        history = self._history(ticker)
+        if history.empty or period == 'max':
+            return history.copy()
+        return history[history.index >= period_start(history.index[-1], period)].copy()
+
+    def info(self, ticker):
+        self._wait()
+        return self._info(ticker)
+
+    def dividends(self, ticker):
+        self._wait()
+        history = self._history(ticker)
+        if 'Dividends' not in history.columns:
+            return pd.Series(dtype=float, name='Dividends', index=history.index[:0])
+        dividends = history['Dividends']
+        return dividends[dividends != 0]
+
+# First timestamp covered by a yfinance-style period string ending at `last`
+def period_start(last, period):
+    if period == 'ytd':
+        return last.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    units = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return last - relativedelta(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+# Serves Ticker.history from the shared memory-mapped price store, falling back to another provider
+class SharedHistoryProvider(MarketDataProvider):
+    def __init__(self, base):
+        self.base = base
+
+    def download(self, ticker, start=None, end=None):
+        return self.base.download(ticker, start=start, end=end)
+
+    def history(self, ticker, period='max'):
+        from pages.utils.shared_prices import load_history
+        history = load_history(ticker)
+        if history is None or history.empty:
+            return self.base.history(ticker, period=period)
+        if period == 'max':
+            return history
+        # Positional slicing keeps the result a view of the mapped values
+        first = history.index.searchsorted(period_start(history.index[-1], period))
+        return history.iloc[first:]
+
+    def info(self, ticker):
+        return self.base.info(ticker)
+
+    def dividends(self, ticker):
+        return self.base.dividends(ticker)
+
+# Write one ticker's fixture in the layout ReplayProvider reads
+def write_fixture(ticker, history, info, fixture_dir=FIXTURES_DIR, fmt='csv'):
+    ticker_dir = os.path.join(fixture_dir, ticker_key(ticker))
+    os.makedirs(ticker_dir, exist_ok=True)
+    history = history.copy()
+    if history.index.tz is not None:
+        history.index = history.index.tz_localize(None)
+    history.index.name = 'Date'
+    if fmt == 'parquet':
+        history.to_parquet(os.path.join(ticker_dir, 'history.parquet'))
+    else:
+        history.to_csv(os.path.join(ticker_dir, 'history.csv'))
+    with open(os.path.join(ticker_dir, 'info.json'), 'w') as f:
+        json.dump(info, f, indent=2, default=str)
+
+# Record live Yahoo Finance data for the given tickers as replay fixtures
+def record_fixtures(tickers, fixture_dir=FIXTURES_DIR, fmt='csv'):
+    live = YFinanceProvider()
+    for ticker in tickers:
+        write_fixture(ticker, live.history(ticker, period='max'), live.info(ticker), fixture_dir, fmt)
+
+_provider = None
+_provider_lock = threading.Lock()
+
+# The process-wide provider selected by TRADING_APP_DATA_PROVIDER
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            backend = os.environ.get(PROVIDER_ENV, 'yfinance').lower()
+            if backend == 'replay':
+                _provider = ReplayProvider(
+                    FIXTURES_DIR,
+                    latency=float(os.environ.get('TRADING_APP_REPLAY_LATENCY_MS', 0)) / 1000,
+                    jitter=float(os.environ.get('TRADING_APP_REPLAY_JITTER_MS', 0)) / 1000,
+                )
+            elif backend == 'yfinance':
+                _provider = YFinanceProvider()
+            else:
+                raise ValueError(f"Unknown {PROVIDER_ENV}: {backend}")
+            # TRADING_APP_SHARED_PRICES=1 maps published histories instead of fetching them per worker
+            if os.environ.get('TRADING_APP_SHARED_PRICES', '') not in ('', '0'):
+                _provider = SharedHistoryProvider(_provider)
+        return _provider
+
+# python -m pages.utils.data_provider record TSLA AAPL [--format parquet] [--dir fixtures]
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Record Yahoo Finance data as replay fixtures')
+    parser.add_argument('command', choices=['record'])
+    parser.add_argument('tickers', nargs='+')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--dir', default=FIXTURES_DIR)
+    args = parser.parse_args()
+    record_fixtures(args.tickers, args.dir, args.format)
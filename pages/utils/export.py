@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import os
+import pandas as pd
+from pages.utils.local_store import store_path, temp_path
+from pages.utils.tracing import trace
+
+# Download formats: file extension and MIME type
+FORMATS = {
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Rows serialised per chunk; only one chunk's text or Arrow batch is in memory at a time
+CHUNK_ROWS = 50_000
+
+# Number of export files kept in the store; older ones are pruned after each write
+KEEP_EXPORTS = 50
+
+# Content hash of a DataFrame (values, index and column labels), used as the export cache key
+def content_key(dataframe, fmt):
+    digest = hashlib.sha256()
+    digest.update(repr(list(dataframe.columns)).encode())
+    digest.update(fmt.encode())
+    digest.update(pd.util.hash_pandas_object(dataframe, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:32]
+
+# Arrow needs string column names; yfinance frames have (Price, Ticker) column tuples
+def _flat_columns(dataframe):
+    if isinstance(dataframe.columns, pd.MultiIndex):
+        dataframe = dataframe.copy(deep=False)
+        dataframe.columns = ['_'.join(str(part) for part in col if str(part)) for col in dataframe.columns]
+    else:
+        dataframe = dataframe.rename(columns=str)
+    return dataframe
+
+def _chunks(dataframe):
+    for start in range(0, max(len(dataframe), 1), CHUNK_ROWS):
+        yield dataframe.iloc[start:start + CHUNK_ROWS]
+
+def _write_csv(dataframe, path, index):
+    with gzip.open(path, 'wt', newline='') as f:
+        for i, chunk in enumerate(_chunks(dataframe)):
+            chunk.to_csv(f, index=index, header=i == 0)
+
+def _write_arrow(dataframe, path, index, parquet):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    dataframe = _flat_columns(dataframe)
+    schema = pa.Schema.from_pandas(dataframe.iloc[:0], preserve_index=index)
+    if parquet:
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    with writer:
+        for chunk in _chunks(dataframe):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=index))
+
+def _prune_exports(directory):
+    files = [os.path.join(directory, name) for name in os.listdir(directory) if not name.endswith('.tmp')]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[KEEP_EXPORTS:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+# Write the DataFrame to the export cache in the given format and return the file path.
+# Files are named by content hash, so an unchanged frame is never serialised twice.
+@trace('export.write_export')
+def write_export(dataframe, fmt, index=True):
+    extension, _ = FORMATS[fmt]
+    key = content_key(dataframe, fmt + str(index))
+    path = store_path('exports', f'{key}.{extension}')
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    tmp_path = temp_path(path)
+    if extension == 'csv.gz':
+        _write_csv(dataframe, tmp_path, index)
+    else:
+        _write_arrow(dataframe, tmp_path, index, parquet=extension == 'parquet')
+    os.replace(tmp_path, path)
+    _prune_exports(os.path.dirname(path))
+    return path
+
+# Bytes of the cached export file, generating it first when needed
+def export_bytes(dataframe, fmt, index=True):
+    with open(write_export(dataframe, fmt, index), 'rb') as f:
+        return f.read()
+
+# Format picker and download button; the file is only generated when the button is clicked
+def export_button(label, dataframe, file_stem, key, index=True):
+    import streamlit as st
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        fmt = st.selectbox("Format", list(FORMATS), key=f'{key}_format', label_visibility='collapsed')
+    extension, mime = FORMATS[fmt]
+    with col2:
+        st.download_button(
+            label,
+            data=lambda: export_bytes(dataframe, fmt, index),
+            file_name=f'{file_stem}.{extension}',
+            mime=mime,
+            key=key,
+            on_click='ignore',
+        )
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from pages.utils.tracing import trace
+
+# Default memory cap for cached figures, measured by their serialized size (bytes)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# LRU cache of built Plotly figures shared by every session of the app.
+# Hits hand the stored figure straight to st.plotly_chart: a figure object is only
+# converted to a dict and serialized there, whereas a dict or JSON string would be
+# validated into a new Figure first, which costs about as much as building it.
+# Cached figures are shared, so callers must not modify them.
+class FigureCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self.lock = threading.Lock()
+
+    # Return the cached figure for key, building and storing it on a miss
+    def get_or_build(self, key, builder):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                # A hit saves the time the builder took when the figure was made
+                self.seconds_saved += entry[2]
+                return entry[0]
+
+        start = time.perf_counter()
+        fig = builder()
+        build_seconds = time.perf_counter() - start
+        with trace('figure_cache.measure'):
+            size = len(fig.to_json())
+        with self.lock:
+            self.misses += 1
+            self._store(key, (fig, size, build_seconds))
+        return fig
+
+    def _store(self, key, entry):
+        size = entry[1]
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = entry
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted[1]
+
+    # Fraction of lookups answered from the cache
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hit_rate(),
+                'seconds_saved': self.seconds_saved,
+            }
+
+_figure_cache = None
+_figure_cache_lock = threading.Lock()
+
+# Process-wide figure cache, created on first use
+def get_figure_cache():
+    global _figure_cache
+    with _figure_cache_lock:
+        if _figure_cache is None:
+            _figure_cache = FigureCache()
+        return _figure_cache
@@ -0,0 +1,189 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from pages.utils.model_train import (
+    get_rolling_mean, get_differencing_order, scaling, evaluate_model, get_forecast, inverse_scaling
+)
+from pages.utils.backtest import walk_forward
+
+# Worker processes doing the fits and how many jobs may be queued or running at once
+FIT_WORKERS = int(os.environ.get('TRADING_APP_FIT_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+FIT_QUEUE = int(os.environ.get('TRADING_APP_FIT_QUEUE', 4 * FIT_WORKERS))
+
+# Pipeline stages; they run in worker processes so they must be picklable top-level functions
+def prepare_stage(close_price):
+    rolling_price = get_rolling_mean(close_price)
+    differencing_order = get_differencing_order(rolling_price)
+    scaled_data, scaler = scaling(rolling_price)
+    return rolling_price, differencing_order, scaled_data, scaler
+
+def evaluate_stage(scaled_data, differencing_order, engine='arima'):
+    return evaluate_model(scaled_data, differencing_order, engine)
+
+def forecast_stage(scaled_data, differencing_order, scaler, engine='arima'):
+    forecast = get_forecast(scaled_data, differencing_order, engine)
+    forecast['Close'] = inverse_scaling(scaler, forecast['Close'])
+    return forecast
+
+# Raised when the queue is full and the caller should fall back to a cached result
+class FitServiceBusy(Exception):
+    pass
+
+# One forecast fit, shared by every session waiting for the same (ticker, engine, last bar)
+class FitJob:
+    def __init__(self, key):
+        self.key = key
+        self.stage = 'Queued'
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.sessions = set()
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.done.is_set()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+# Runs forecast fits on a bounded process pool and keeps the latest result per ticker
+class FitService:
+    def __init__(self, max_workers=FIT_WORKERS, max_pending=FIT_QUEUE):
+        # spawn avoids forking the multi-threaded Streamlit server
+        self.pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'))
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.session_jobs = {}
+        self.last_known = {}
+        # Last failed job per (ticker, engine); it is served for its bar instead of refitting
+        self.last_failed = {}
+
+    # Start (or join) the fit for this ticker's latest bar; the session's previous job is
+    # cancelled when it asks for something else
+    def submit(self, session_id, ticker, close_price, engine='arima'):
+        key = (ticker, engine, close_price.index[-1])
+        with self.lock:
+            self._detach(session_id, key)
+            last = self.last_known.get((ticker, engine))
+            if last is not None and last['as_of'] == key[2]:
+                job = FitJob(key)
+                job.result, job.stage, job.progress = last, 'Done', 1.0
+                job.done.set()
+                return job
+            failed = self.last_failed.get((ticker, engine))
+            if failed is not None and failed.key == key:
+                return failed
+            job = self.jobs.get(key)
+            if job is None or job.cancelled.is_set():
+                if not self.slots.acquire(blocking=False):
+                    raise FitServiceBusy(f"{FIT_QUEUE} forecasts are already queued")
+                job = FitJob(key)
+                self.jobs[key] = job
+                threading.Thread(target=self._run, args=(job, close_price, engine), daemon=True).start()
+            job.sessions.add(session_id)
+            self.session_jobs[session_id] = job
+            return job
+
+    # Start (or join) a walk-forward backtest. It takes a queue slot like a forecast fit, runs its
+    # fold blocks on the same pool, and its progress is the fraction of blocks finished.
+    def submit_backtest(self, ticker, prices, engine, n_folds, window):
+        key = ('backtest', ticker, engine, n_folds, window, prices.index[-1])
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is None:
+                if not self.slots.acquire(blocking=False):
+                    raise FitServiceBusy(f"{FIT_QUEUE} forecasts are already queued")
+                job = FitJob(key)
+                self.jobs[key] = job
+                threading.Thread(target=self._run_backtest, args=(job, prices, engine, n_folds, window),
+                                 daemon=True).start()
+            return job
+
+    # Latest finished result for a ticker and engine, possibly from an older bar
+    def latest(self, ticker, engine='arima'):
+        with self.lock:
+            return self.last_known.get((ticker, engine))
+
+    def _detach(self, session_id, key):
+        previous = self.session_jobs.pop(session_id, None)
+        if previous is None or previous.key == key:
+            return
+        previous.sessions.discard(session_id)
+        if not previous.sessions and not previous.finished:
+            previous.cancel()
+
+    def _stage(self, job, stage, progress, func, *args):
+        if job.cancelled.is_set():
+            raise CancelledError()
+        job.stage, job.progress = stage, progress
+        job.future = self.pool.submit(func, *args)
+        result = job.future.result()
+        if job.cancelled.is_set():
+            raise CancelledError()
+        return result
+
+    def _run(self, job, close_price, engine):
+        try:
+            rolling_price, differencing_order, scaled_data, scaler = self._stage(
+                job, 'Preparing data', 0.05, prepare_stage, close_price)
+            rmse = self._stage(job, 'Evaluating model', 0.35, evaluate_stage, scaled_data, differencing_order, engine)
+            forecast = self._stage(
+                job, 'Forecasting', 0.7, forecast_stage, scaled_data, differencing_order, scaler, engine)
+            job.result = {'rolling_price': rolling_price, 'rmse': rmse, 'forecast': forecast,
+                          'as_of': job.key[2], 'engine': engine}
+            job.stage, job.progress = 'Done', 1.0
+            with self.lock:
+                self.last_known[job.key[:2]] = job.result
+                self.last_failed.pop(job.key[:2], None)
+        except CancelledError:
+            job.stage = 'Cancelled'
+        except Exception as e:
+            job.error = e
+            job.stage = 'Failed'
+            with self.lock:
+                self.last_failed[job.key[:2]] = job
+        finally:
+            with self.lock:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+                for session_id in job.sessions:
+                    if self.session_jobs.get(session_id) is job:
+                        del self.session_jobs[session_id]
+            self.slots.release()
+            job.done.set()
+
+    def _run_backtest(self, job, prices, engine, n_folds, window):
+        def progress(fraction):
+            job.progress = fraction
+        try:
+            job.stage = 'Backtesting'
+            job.result = walk_forward(prices, engine=engine, n_folds=n_folds, window=window,
+                                      executor=self.pool, progress=progress)
+            job.stage, job.progress = 'Done', 1.0
+        except Exception as e:
+            job.error = e
+            job.stage = 'Failed'
+        finally:
+            with self.lock:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+            self.slots.release()
+            job.done.set()
+
+_fit_service = None
+_fit_service_lock = threading.Lock()
+
+# Process-wide fitting service, created on first use
+def get_fit_service():
+    global _fit_service
+    with _fit_service_lock:
+        if _fit_service is None:
+            _fit_service = FitService()
+        return _fit_service
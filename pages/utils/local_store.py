@@ -0,0 +1,50 @@
+import os
+import re
+import tempfile
+import pandas as pd
+
+# Root directory of the on-disk store shared by the pages (override with TRADING_APP_STORE)
+STORE_DIR = os.environ.get(
+    'TRADING_APP_STORE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '.store')
+)
+
+# Ticker symbols as they may appear in store paths, e.g. AAPL, BRK.B, ^GSPC, EURUSD=X
+TICKER_PATTERN = re.compile(r'[A-Z0-9.^=-]{1,15}')
+
+# Upper-cased ticker for use in a store path; raises ValueError for anything that is not a
+# plain symbol, so user input such as '../x' can never name a file outside the store
+def ticker_key(ticker):
+    key = str(ticker).strip().upper()
+    if not TICKER_PATTERN.fullmatch(key) or not key.strip('.'):
+        raise ValueError(f"invalid ticker symbol: {ticker!r}")
+    return key
+
+# Build a path inside the store, creating parent directories as needed
+def store_path(*parts):
+    path = os.path.join(STORE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+# New empty temporary file next to `path`, to be moved over it with os.replace once written.
+# Every writer gets its own file, so sessions (threads of one process) never share one.
+def temp_path(path):
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp',
+                                    dir=os.path.dirname(path))
+    os.close(fd)
+    return tmp_path
+
+# Write a DataFrame atomically so readers never see a half-written file
+def save_frame(dataframe, *parts):
+    path = store_path(*parts)
+    tmp_path = temp_path(path)
+    dataframe.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+# Read a DataFrame from the store, or None when it has not been written yet
+def load_frame(*parts):
+    path = os.path.join(STORE_DIR, *parts)
+    if not os.path.exists(path):
+        return None
+    return pd.read_pickle(path)
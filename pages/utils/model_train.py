@@ -72,32 +72,36 @@
 # # Inverse scaling transformation
 # def inverse_scaling(scaler, scaled_data):
 #     return scaler.inverse_transform(np.array(scaled_data).reshape(-1, 1))
-import yfinance as yf
-from statsmodels.tsa.stattools import adfuller
-from sklearn.metrics import mean_squared_error
-from statsmodels.tsa.arima.model import ARIMA
+# statsmodels and scikit-learn are imported inside the functions that use them,
+# so importing this module stays cheap until a fit is actually requested
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
 import pandas as pd
+from pages.utils.tracing import trace
+from pages.utils.data_provider import get_provider
 
 # Function to fetch stock data
+@trace('model_train.get_data')
 def get_data(ticker):
-    stock_data = yf.download(ticker, start='2024-01-01')
+    stock_data = get_provider().download(ticker, start='2024-01-01')
     return stock_data[['Close']]
 
 # Check stationarity of time series data
+@trace('model_train.stationary_check')
 def stationary_check(close_price):
+    from statsmodels.tsa.stattools import adfuller
     adf_test = adfuller(close_price.dropna())  # Drop NaN values for ADF test
     p_value = round(adf_test[1], 3)
     return p_value
 
 # Compute rolling mean for smoothing
+@trace('model_train.get_rolling_mean')
 def get_rolling_mean(close_price):
     rolling_price = close_price.rolling(window=7).mean().dropna()
     return rolling_price
 
 # Determine differencing order (d) for stationarity
+@trace('model_train.get_differencing_order')
 def get_differencing_order(close_price):
     p_value = stationary_check(close_price)
     d = 0
@@ -107,32 +111,56 @@ def get_differencing_order(close_price):
         p_value = stationary_check(close_price)
     return d
 
-# Fit ARIMA model with optimized settings
-def fit_model(data, differencing_order):
+# Forecasting engines: 'arima' fits statsmodels ARIMA per series, 'holt' uses the batched
+# NumPy Holt smoother from batch_forecast (the differencing order is not used by 'holt')
+ENGINES = ('arima', 'holt')
+
+# Fit the selected engine and forecast the next 30 steps
+@trace('model_train.fit_model')
+def fit_model(data, differencing_order, engine='arima'):
+    predictions, _ = fit_model_params(data, differencing_order, engine)
+    return predictions
+
+# Same as fit_model, but also returns the fitted parameters. `warm_start` takes the parameters
+# of a previous fit of the same engine and order: ARIMA starts its optimiser from them, and
+# Holt only searches the grid points next to them.
+def fit_model_params(data, differencing_order, engine='arima', warm_start=None):
+    if engine == 'holt':
+        from pages.utils.batch_forecast import holt_forecast
+        predictions, fitted = holt_forecast(data, horizon=30, near=warm_start)
+        return predictions[:, 0], {'alpha': fitted['alpha'], 'beta': fitted['beta']}
+    if engine != 'arima':
+        raise ValueError(f"Unknown forecasting engine: {engine}")
+    from statsmodels.tsa.arima.model import ARIMA
     model = ARIMA(data, order=(1, differencing_order, 1))  # Use lower order for ARIMA
-    model_fit = model.fit()  # Use the default method for optimization
+    model_fit = model.fit(start_params=warm_start)  # Use the default method for optimization
 
     forecast_steps = 30
     forecast = model_fit.get_forecast(steps=forecast_steps)
     predictions = forecast.predicted_mean
-    return predictions
+    return predictions, model_fit.params
 
 # Evaluate model performance using RMSE
-def evaluate_model(original_price, differencing_order):
+@trace('model_train.evaluate_model')
+def evaluate_model(original_price, differencing_order, engine='arima'):
+    from sklearn.metrics import mean_squared_error
     train_data, test_data = original_price[:-30], original_price[-30:]
-    predictions = fit_model(train_data, differencing_order)
+    predictions = fit_model(train_data, differencing_order, engine)
     rmse = np.sqrt(mean_squared_error(test_data, predictions))
     return round(rmse, 2)
 
 # Scale data using StandardScaler
+@trace('model_train.scaling')
 def scaling(close_price):
+    from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
     scaled_data = scaler.fit_transform(np.array(close_price).reshape(-1, 1))
     return scaled_data, scaler
 
 # Generate 30-day forecast
-def get_forecast(original_price, differencing_order):
-    predictions = fit_model(original_price, differencing_order)
+@trace('model_train.get_forecast')
+def get_forecast(original_price, differencing_order, engine='arima'):
+    predictions = fit_model(original_price, differencing_order, engine)
     start_date = datetime.now().strftime('%Y-%m-%d')
     end_date = (datetime.now() + timedelta(days=29)).strftime('%Y-%m-%d')
     forecast_index = pd.date_range(start=start_date, end=end_date, freq='D')
@@ -141,5 +169,6 @@ def get_forecast(original_price, differencing_order):
     return forecast_df
 
 # Inverse scaling transformation
+@trace('model_train.inverse_scaling')
 def inverse_scaling(scaler, scaled_data):
     return scaler.inverse_transform(np.array(scaled_data).reshape(-1, 1))
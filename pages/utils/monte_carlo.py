@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Monte Carlo price paths and tail-risk metrics.
+#
+# Paths are generated in chunks of `chunk_size` as one (paths x horizon) NumPy
+# array per chunk, so memory stays bounded however many paths are requested.
+# The fan chart is built from per-step histograms of cumulative log returns,
+# accumulated chunk by chunk on a fixed grid with 0.1% resolution. Terminal
+# returns are kept exactly (one float32 per path) for VaR/CVaR.
+BIN_EDGES = np.linspace(-3.0, 3.0, 6001)
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+DEFAULT_CHUNK = 10_000
+
+# Daily log returns of a price series (1-D) or of each column of a price matrix (2-D)
+def log_returns(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    returns = np.diff(np.log(prices), axis=0)
+    return returns[~np.isnan(returns).any(axis=1)] if returns.ndim == 2 else returns[~np.isnan(returns)]
+
+# Daily log returns of a daily-rebalanced portfolio of the given asset log returns
+def portfolio_log_returns(asset_returns, weights):
+    return np.log1p(np.expm1(asset_returns) @ weights)
+
+# Mean daily log return of the asset, or of the portfolio when weights are given
+def _mean_return(returns, weights=None):
+    if weights is None:
+        return returns.mean()
+    return portfolio_log_returns(returns, weights).mean()
+
+# One chunk of cumulative log-return paths, shape (n x horizon)
+def _simulate_chunk(returns, horizon, n, rng, method, weights, drift):
+    if method == 'bootstrap':
+        # Resample whole historical days so cross-asset correlation is preserved
+        daily = returns[rng.integers(0, len(returns), size=(n, horizon))]
+        if weights is not None:
+            daily = portfolio_log_returns(daily, weights)
+        if drift is not None:
+            daily = daily - _mean_return(returns, weights) + drift
+    elif method == 'gbm':
+        # Log-normal model fitted to the historical returns
+        if weights is None:
+            mean = returns.mean() if drift is None else drift
+            daily = rng.normal(0.0, returns.std(ddof=1), size=(n, horizon)) + mean
+        else:
+            assets = rng.multivariate_normal(returns.mean(axis=0), np.cov(returns, rowvar=False), size=(n, horizon))
+            daily = portfolio_log_returns(assets, weights)
+            if drift is not None:
+                daily = daily - _mean_return(returns, weights) + drift
+    else:
+        raise ValueError(f"Unknown simulation method: {method}")
+    return np.cumsum(daily, axis=1)
+
+# Simulate n_paths price paths over `horizon` days and summarise them.
+#   method='bootstrap' resamples historical daily returns, 'gbm' draws from a fitted log-normal.
+#   weights turns a (days x assets) return matrix into a portfolio simulation.
+#   drift (per-step log returns, e.g. from a model forecast) recentres the paths on that model.
+# Returns {'quantiles': DataFrame of price quantiles per step, 'terminal_returns': simple returns}.
+def simulate(returns, start_price=1.0, horizon=30, n_paths=50_000, method='bootstrap',
+             weights=None, drift=None, chunk_size=DEFAULT_CHUNK, seed=None):
+    returns = np.asarray(returns, dtype=np.float64)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+        weights = weights / weights.sum()
+    rng = np.random.default_rng(seed)
+    n_bins = len(BIN_EDGES) - 1
+    counts = np.zeros((horizon, n_bins), dtype=np.int64)
+    step_offsets = (np.arange(horizon) * n_bins).reshape(1, -1)
+    terminal = np.empty(n_paths, dtype=np.float32)
+
+    done = 0
+    while done < n_paths:
+        n = min(chunk_size, n_paths - done)
+        paths = _simulate_chunk(returns, horizon, n, rng, method, weights, drift)
+        bins = np.clip(np.searchsorted(BIN_EDGES, paths, side='right') - 1, 0, n_bins - 1)
+        counts += np.bincount((bins + step_offsets).ravel(), minlength=horizon * n_bins).reshape(horizon, n_bins)
+        terminal[done:done + n] = np.expm1(paths[:, -1])
+        done += n
+
+    cdf = np.cumsum(counts, axis=1) / n_paths
+    centres = (BIN_EDGES[:-1] + BIN_EDGES[1:]) / 2
+    quantiles = pd.DataFrame(
+        {q: start_price * np.exp(centres[np.argmax(cdf >= q, axis=1)]) for q in QUANTILES},
+        index=pd.RangeIndex(1, horizon + 1, name='Day')
+    )
+    return {'quantiles': quantiles, 'terminal_returns': terminal}
+
+# Value at Risk and Conditional VaR (expected shortfall) of a sample of returns, as positive losses
+def var_cvar(returns, level=0.95):
+    losses = -np.asarray(returns, dtype=np.float64)
+    var = np.quantile(losses, level)
+    return float(var), float(losses[losses >= var].mean())
+
+# Historical VaR/CVaR of `horizon`-day returns, from overlapping windows of the price history
+def historical_var(prices, horizon=1, level=0.95):
+    prices = np.asarray(prices, dtype=np.float64).reshape(-1)
+    prices = prices[~np.isnan(prices)]
+    returns = prices[horizon:] / prices[:-horizon] - 1
+    return var_cvar(returns, level)
@@ -0,0 +1,235 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from pages.utils.local_store import STORE_DIR, temp_path, ticker_key
+from pages.utils.precompute import ROLLING_WINDOW, VOLATILITY_WINDOW
+
+# Out-of-core rolling analytics for histories too long to load at once (e.g. years of minute bars).
+#
+# Bars are stored column by column as raw little-endian files under bars/<TICKER>/:
+# timestamp.i8 (int64 ns, UTC) and one .f8 file per price/volume column, plus meta.json
+# with the row count. Readers map one chunk of rows at a time with np.memmap, and each
+# pipeline is a generator that yields one output chunk per input chunk. Peak memory is
+# therefore set by chunk_rows, not by the length of the history.
+#
+# State carried across chunk boundaries:
+#   rolling volatility  the last window-1 closes, prepended to the next chunk
+#   rolling beta        the previous close of each series and the last window-1 aligned return pairs
+#   RSI                 the previous close and the running sums/weights of the two EWMs
+#
+# Each pipeline gives the same values as its in-memory counterpart, up to floating-point
+# rounding. A single chunk is identical. Across chunks, rolling beta and RSI differ by
+# about 1e-13 relative or less, and rolling volatility by up to about 1e-8 on ten years
+# of minute bars, growing with the length of the history. The in-memory counterparts are
+# close.rolling(window).std() (Stock_Analysis, precompute), the CAPM_Beta rolling beta and
+# pandas_ta.rsi. Bit-for-bit equality across chunks is not possible: pandas updates rolling
+# moments online from the start of the array, so the rounding depends on where the array starts.
+BARS_DIR = os.path.join(STORE_DIR, 'bars')
+
+# Rows per chunk read from the memory-mapped columns (about 130 trading days of minute bars);
+# a few MB per pipeline, whatever the length of the history
+CHUNK_ROWS = 50_000
+
+COLUMN_SUFFIX = {'timestamp': 'i8'}
+RSI_LENGTH = 14
+
+def _ticker_dir(ticker):
+    return os.path.join(BARS_DIR, ticker_key(ticker))
+
+def _column_path(directory, column):
+    return os.path.join(directory, f"{column}.{COLUMN_SUFFIX.get(column, 'f8')}")
+
+def _dtype(column):
+    return np.dtype('<i8') if column == 'timestamp' else np.dtype('<f8')
+
+def _read_meta(directory):
+    path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(path):
+        return {'rows': 0, 'columns': []}
+    with open(path) as f:
+        return json.load(f)
+
+def read_meta(ticker):
+    return _read_meta(_ticker_dir(ticker))
+
+# Append bars (DataFrame chunks with a DatetimeIndex) to the ticker's columns; timestamps must keep increasing.
+# Returns the total number of rows stored.
+def write_bars(ticker, chunks):
+    return _append_bars(_ticker_dir(ticker), ticker, chunks)
+
+def _append_bars(directory, label, chunks):
+    os.makedirs(directory, exist_ok=True)
+    meta = _read_meta(directory)
+    last = None
+    if meta['rows']:
+        last = _read_column(directory, 'timestamp', meta['rows'] - 1, meta['rows'])[0]
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        index = pd.DatetimeIndex(chunk.index)
+        index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+        timestamps = index.as_unit('ns').asi8
+        if np.any(np.diff(timestamps) <= 0) or (last is not None and timestamps[0] <= last):
+            raise ValueError(f"bars for {label} must be appended in increasing time order")
+        columns = meta['columns'] or list(chunk.columns)
+        if list(chunk.columns) != columns:
+            raise ValueError(f"bars for {label} must have the columns {columns}")
+        with open(_column_path(directory, 'timestamp'), 'ab') as f:
+            f.write(timestamps.astype(_dtype('timestamp')).tobytes())
+        for column in columns:
+            with open(_column_path(directory, column), 'ab') as f:
+                f.write(chunk[column].to_numpy(dtype=_dtype(column)).tobytes())
+        meta = {'rows': meta['rows'] + len(chunk), 'columns': columns}
+        last = timestamps[-1]
+        # Written after the column data, so readers never see rows that are not on disk yet
+        tmp_path = temp_path(os.path.join(directory, 'meta.json'))
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+    return meta['rows']
+
+# Rows [start, stop) of one column as a read-only memory map
+def read_column(ticker, column, start=0, stop=None):
+    return _read_column(_ticker_dir(ticker), column, start, stop)
+
+def _read_column(directory, column, start=0, stop=None):
+    stop = _read_meta(directory)['rows'] if stop is None else stop
+    if stop <= start:
+        return np.empty(0, dtype=_dtype(column))
+    dtype = _dtype(column)
+    return np.memmap(_column_path(directory, column), dtype=dtype, mode='r',
+                     offset=start * dtype.itemsize, shape=(stop - start,))
+
+# Yield (timestamps, values) for consecutive chunks of one column
+def iter_column(ticker, column='Close', chunk_rows=CHUNK_ROWS):
+    rows = read_meta(ticker)['rows']
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        yield read_column(ticker, 'timestamp', start, stop), read_column(ticker, column, start, stop)
+
+def _index(timestamps):
+    return pd.DatetimeIndex(np.asarray(timestamps).view('datetime64[ns]')).tz_localize('UTC')
+
+# Rolling standard deviation of the close, yielded chunk by chunk
+def rolling_volatility(ticker, window=VOLATILITY_WINDOW, chunk_rows=CHUNK_ROWS):
+    tail = np.empty(0)
+    for timestamps, close in iter_column(ticker, 'Close', chunk_rows):
+        values = np.concatenate([tail, close])
+        volatility = pd.Series(values).rolling(window).std().to_numpy()[len(tail):]
+        tail = values[-(window - 1):] if window > 1 else np.empty(0)
+        yield pd.Series(volatility, index=_index(timestamps), name='Volatility')
+
+# Simple returns of one chunk, using the last close of the previous chunk for the first row
+def _chunk_returns(close, previous):
+    values = np.concatenate([[previous], close])
+    return values[1:] / values[:-1] - 1
+
+# Rolling beta of the stock against the market on bars present in both, yielded chunk by chunk.
+# Returns are taken on each series first and then aligned, as on the CAPM Beta page.
+def rolling_beta(ticker, market, window=ROLLING_WINDOW, chunk_rows=CHUNK_ROWS):
+    market_rows = read_meta(market)['rows']
+    stock_previous = np.nan
+    tail_x, tail_y = np.empty(0), np.empty(0)
+    for timestamps, close in iter_column(ticker, 'Close', chunk_rows):
+        stock_returns = _chunk_returns(close, stock_previous)
+        stock_previous = close[-1]
+
+        # Market bars inside this chunk's time range, plus the bar before for its first return
+        market_times = read_column(market, 'timestamp', 0, market_rows)
+        lo = np.searchsorted(market_times, timestamps[0], side='left')
+        hi = np.searchsorted(market_times, timestamps[-1], side='right')
+        start = max(lo - 1, 0)
+        market_close = read_column(market, 'Close', start, hi)
+        market_returns = _chunk_returns(market_close, np.nan)[lo - start:]
+        market_times = market_times[lo:hi]
+
+        common, stock_at, market_at = np.intersect1d(timestamps, market_times, assume_unique=True, return_indices=True)
+        x, y = market_returns[market_at], stock_returns[stock_at]
+        valid = ~(np.isnan(x) | np.isnan(y))
+        common, x, y = common[valid], x[valid], y[valid]
+
+        xs, ys = pd.Series(np.concatenate([tail_x, x])), pd.Series(np.concatenate([tail_y, y]))
+        beta = (ys.rolling(window).cov(xs) / xs.rolling(window).var()).to_numpy()[len(tail_x):]
+        if window > 1:
+            tail_x, tail_y = xs.to_numpy()[-(window - 1):], ys.to_numpy()[-(window - 1):]
+        yield pd.Series(beta, index=_index(common), name='Rolling Beta')
+
+# Running state of pandas' adjusted EWM (ewm(alpha).mean() with adjust=True)
+class _EwmState:
+    def __init__(self, alpha, min_periods):
+        self.decay = 1.0 - alpha
+        self.min_periods = min_periods
+        self.total = 0.0
+        self.weight = 0.0
+        self.nobs = 0
+
+    # EWM mean of each value of the chunk given everything before it; values must not contain NaN
+    def update(self, values):
+        if len(values) == 0:
+            return np.empty(0)
+        # Chunk-local sums from pandas, then the carried sums decayed into every step
+        local_mean = pd.Series(values).ewm(alpha=1.0 - self.decay).mean().to_numpy()
+        steps = np.arange(1, len(values) + 1)
+        local_weight = (1.0 - self.decay ** steps) / (1.0 - self.decay)
+        carried = self.decay ** steps
+        total = carried * self.total + local_mean * local_weight
+        weight = carried * self.weight + local_weight
+        mean = total / weight
+        self.total, self.weight = total[-1], weight[-1]
+        counts = self.nobs + steps
+        self.nobs += len(values)
+        return np.where(counts >= self.min_periods, mean, np.nan)
+
+# RSI as computed by pandas_ta.rsi (Wilder smoothing via an adjusted EWM), yielded chunk by chunk
+def rsi(ticker, length=RSI_LENGTH, chunk_rows=CHUNK_ROWS):
+    gains = _EwmState(1.0 / length, length)
+    losses = _EwmState(1.0 / length, length)
+    previous = None
+    for timestamps, close in iter_column(ticker, 'Close', chunk_rows):
+        close = np.asarray(close)
+        if previous is None:
+            # The first bar has no change; pandas starts both averages at the second bar
+            change = np.diff(close)
+            lead = [np.nan]
+        else:
+            change = np.diff(np.concatenate([[previous], close]))
+            lead = []
+        previous = close[-1]
+        positive = gains.update(np.where(change > 0, change, 0.0))
+        negative = losses.update(np.where(change < 0, change, 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = 100 * positive / (positive + np.abs(negative))
+        yield pd.Series(np.concatenate([lead, values]), index=_index(timestamps), name='RSI')
+
+# Write a pipeline's output chunks to bars/<TICKER>/derived/<name> as columns, keeping memory flat
+def write_output(ticker, name, chunks):
+    directory = os.path.join(_ticker_dir(ticker), 'derived', name)
+    return _append_bars(directory, f'{ticker}/{name}', (chunk.to_frame() for chunk in chunks))
+
+# Read a small result fully into memory (for tests and short histories)
+def collect(chunks):
+    return pd.concat(list(chunks))
+
+# python -m pages.utils.out_of_core ingest TICKER bars.csv [--chunk-rows N]
+# python -m pages.utils.out_of_core run TICKER [--market SPY]
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Out-of-core rolling analytics')
+    parser.add_argument('command', choices=['ingest', 'run'])
+    parser.add_argument('ticker')
+    parser.add_argument('csv', nargs='?', help='CSV with a timestamp first column and OHLCV columns (ingest)')
+    parser.add_argument('--market', default=None, help='market ticker for the rolling beta (run)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    args.ticker = args.ticker.upper()
+    if args.command == 'ingest':
+        chunks = pd.read_csv(args.csv, index_col=0, parse_dates=True, chunksize=args.chunk_rows)
+        print(f"{args.ticker}: {write_bars(args.ticker, chunks)} bars stored")
+    else:
+        for name, chunks in [('volatility', rolling_volatility(args.ticker, chunk_rows=args.chunk_rows)),
+                             ('rsi', rsi(args.ticker, chunk_rows=args.chunk_rows))]:
+            print(f"{args.ticker} {name}: {write_output(args.ticker, name, chunks)} rows")
+        if args.market:
+            rows = write_output(args.ticker, 'rolling_beta', rolling_beta(args.ticker, args.market, chunk_rows=args.chunk_rows))
+            print(f"{args.ticker} rolling beta against {args.market}: {rows} rows")
@@ -0,0 +1,28 @@
+import math
+import streamlit as st
+from pages.utils.plotly_figure import plotly_table
+
+# Rows per page and the pixel heights used to size the table to its page
+PAGE_SIZE = 10
+HEADER_HEIGHT = 35
+ROW_HEIGHT = 30
+
+# Paginated table: only the visible page is formatted and sent to the browser.
+# It runs as a fragment, so changing page reruns just the table, not the whole page.
+@st.fragment
+def paged_table(dataframe, key, page_size=PAGE_SIZE, decimals=2):
+    n_pages = max(math.ceil(len(dataframe) / page_size), 1)
+    page = min(st.session_state.get(key, 1), n_pages)
+
+    fig = plotly_table(dataframe, page=page - 1, page_size=page_size, decimals=decimals)
+    rows = min(page_size, len(dataframe) - (page - 1) * page_size)
+    fig.update_layout(height=HEADER_HEIGHT + ROW_HEIGHT * max(rows, 1) + 10)
+    st.plotly_chart(fig, use_container_width=True)
+
+    if n_pages > 1:
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.number_input("Page", min_value=1, max_value=n_pages, step=1, key=key)
+        with col2:
+            first = (page - 1) * page_size + 1
+            st.caption(f"Rows {first}-{first + rows - 1} of {len(dataframe)}")
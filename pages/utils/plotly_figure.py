@@ -1,12 +1,44 @@
 import plotly.graph_objects as go
 import dateutil
+import dateutil.relativedelta
 import datetime
-import pandas_ta as pta
-def plotly_table(dataframe):
+import numpy as np
+import pandas as pd
+from pages.utils.tracing import trace
+
+# Import pandas_ta only when an indicator is drawn; it is slow to import and
+# still references np.NaN, which was removed in NumPy 2
+def _pandas_ta():
+    import numpy as np
+    if not hasattr(np, 'NaN'):
+        np.NaN = np.nan
+    import pandas_ta
+    return pandas_ta
+
+# Format a column (or index) as display strings in one vectorized pass, chosen by dtype
+def format_column(values, decimals=2):
+    values = pd.Index(values)
+    if isinstance(values, pd.DatetimeIndex):
+        return np.asarray(values.strftime('%Y-%m-%d'), dtype=object)
+    if pd.api.types.is_float_dtype(values.dtype):
+        array = values.to_numpy(dtype=float)
+        text = np.char.mod(f'%.{decimals}f', array)
+        return np.where(np.isnan(array), '', text).astype(object)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return np.char.mod('%d', values.to_numpy()).astype(object)
+    return values.astype(str).to_numpy(dtype=object)
+
+# Table of a DataFrame; with page_size set, only that page of rows is formatted and sent to the browser
+@trace('plotly_figure.plotly_table')
+def plotly_table(dataframe, page=0, page_size=None, decimals=2):
     headerColor = 'grey'
     rowEvenColor = '#f8fafd'
     rowOddColor = 'white'
 
+    if page_size is not None:
+        dataframe = dataframe.iloc[page * page_size:(page + 1) * page_size]
+    index_labels = np.char.add(np.char.add('<b>', format_column(dataframe.index).astype(str)), '</b>')
+
     fig = go.Figure(data=[go.Table(
         header=dict(
             values=["<b></b>"] + ["<b>" + str(i)[:10] + "</b>" for i in dataframe.columns],
@@ -17,7 +49,7 @@ def plotly_table(dataframe):
             height=35
         ),
         cells=dict(
-            values=[["<b>" + str(i) + "</b>" for i in dataframe.index]] + [dataframe[i] for i in dataframe.columns],
+            values=[index_labels] + [format_column(dataframe.iloc[:, i], decimals) for i in range(dataframe.shape[1])],
             fill_color=[[rowOddColor, rowEvenColor] * (len(dataframe) // 2)],
             align='left',
             line_color='white',
@@ -45,7 +77,20 @@ def filter_data(dataframe, num_period):
         date = dataframe.index[0]
     return dataframe.reset_index()[dataframe.reset_index()['Date']> date]
 
-def close_chart(dataframe, num_period=False):
+# Maximum number of bars a price chart should draw
+POINT_BUDGET = 1000
+
+# Pick the finest pyramid level whose bars for the period fit in the point budget
+def resolution_for_period(pyramid, num_period):
+    for level in ['daily', 'weekly', 'monthly']:
+        if len(filter_data(pyramid[level], num_period)) <= POINT_BUDGET:
+            return pyramid[level]
+    return pyramid['monthly']
+
+@trace('plotly_figure.close_chart')
+def close_chart(dataframe, num_period=False, pyramid=None):
+    if pyramid is not None and num_period:
+        dataframe = resolution_for_period(pyramid, num_period)
     if num_period:
         dataframe = filter_data(dataframe, num_period)  
 
@@ -76,7 +121,10 @@ def close_chart(dataframe, num_period=False):
 
     return fig
 
-def candlestick(dataframe, num_period):
+@trace('plotly_figure.candlestick')
+def candlestick(dataframe, num_period, pyramid=None):
+    if pyramid is not None:
+        dataframe = resolution_for_period(pyramid, num_period)
     dataframe = filter_data(dataframe, num_period)  # Assuming filter_data is defined elsewhere
     fig = go.Figure()
     fig.add_trace(go.Candlestick(x=dataframe['Date'],
@@ -91,7 +139,9 @@ def candlestick(dataframe, num_period):
                       paper_bgcolor='#e1efff')
     return fig
 
+@trace('plotly_figure.RSI')
 def RSI(dataframe, num_period):
+    pta = _pandas_ta()
     dataframe['RSI'] = pta.rsi(dataframe['Close'])  
     dataframe = filter_data(dataframe, num_period) 
     fig = go.Figure()
@@ -130,7 +180,9 @@ def RSI(dataframe, num_period):
     )
     return fig
 
+@trace('plotly_figure.Moving_average')
 def Moving_average(dataframe, num_period):
+    pta = _pandas_ta()
     dataframe['SMA_50'] = pta.sma(dataframe['Close'], 50) 
     dataframe = filter_data(dataframe, num_period) 
     fig = go.Figure()
@@ -176,7 +228,9 @@ def Moving_average(dataframe, num_period):
 
     return fig
 
+@trace('plotly_figure.MACD')
 def MACD(dataframe, num_period):
+    pta = _pandas_ta()
     macd = pta.macd(dataframe['Close']).iloc[:, 0]
     macd_signal = pta.macd(dataframe['Close']).iloc[:,1]
     macd_hist = pta.macd(dataframe['Close']).iloc[:, 2] 
@@ -213,6 +267,7 @@ def MACD(dataframe, num_period):
 
     return fig
 
+@trace('plotly_figure.Moving_average_forecast')
 def Moving_average_forecast(forecast):
     fig = go.Figure()
 
@@ -244,3 +299,41 @@ def Moving_average_forecast(forecast):
 
     return fig
 
+@trace('plotly_figure.forecast_fan_chart')
+def forecast_fan_chart(history, quantiles):
+    # Future dates continue from the last historical bar on business days
+    future = pd.bdate_range(history.index[-1], periods=len(quantiles) + 1)[1:]
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=history.index, y=history,
+        mode='lines', name='Close Price',
+        line=dict(width=2, color='black')
+    ))
+
+    bands = [(0.05, 0.95, 'rgba(255, 0, 0, 0.15)', '5-95%'), (0.25, 0.75, 'rgba(255, 0, 0, 0.3)', '25-75%')]
+    for low, high, color, name in bands:
+        fig.add_trace(go.Scatter(
+            x=future, y=quantiles[high],
+            mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=future, y=quantiles[low],
+            mode='lines', line=dict(width=0), fill='tonexty', fillcolor=color, name=name
+        ))
+
+    fig.add_trace(go.Scatter(
+        x=future, y=quantiles[0.5],
+        mode='lines', name='Median Path',
+        line=dict(width=2, color='red')
+    ))
+
+    fig.update_layout(
+        height=500,
+        margin=dict(l=0, r=20, t=20, b=0),
+        plot_bgcolor='white',
+        paper_bgcolor='#e1efff',
+        legend=dict(yanchor="top", xanchor="right")
+    )
+
+    return fig
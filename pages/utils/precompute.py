@@ -0,0 +1,190 @@
+import datetime
+import json
+import os
+import pickle
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pages.utils.local_store import STORE_DIR, store_path, temp_path, ticker_key
+from pages.utils.data_provider import get_provider
+from pages.utils.price_pyramid import update_pyramid
+from pages.utils.shared_prices import publish_history
+
+# Bump when the layout of a precomputed payload changes; older versions are ignored by the pages
+SCHEMA_VERSION = 1
+
+# Defaults the pages use, so precomputed results line up with what a user sees first
+MARKET_TICKER = '^GSPC'
+ROLLING_WINDOW = 180
+VOLATILITY_WINDOW = 30
+
+WATCHLIST_PATH = os.environ.get(
+    'TRADING_APP_WATCHLIST',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'watchlist.txt')
+)
+
+# Tickers to precompute, one per line ('#' starts a comment)
+def load_watchlist(path=WATCHLIST_PATH):
+    with open(path) as f:
+        lines = [line.split('#')[0].strip() for line in f]
+    return [ticker_key(line) for line in lines if line]
+
+# Payloads live under precomputed/v<schema>/<run date>/<TICKER>.pkl with a LATEST pointer file
+VERSION_PARTS = ('precomputed', f'v{SCHEMA_VERSION}')
+
+def _version_dir():
+    return os.path.join(STORE_DIR, *VERSION_PARTS)
+
+# Forecast for one ticker exactly as Stock_Prediction computes it (runs in a worker process)
+def forecast_ticker(ticker):
+    from pages.utils.model_train import get_data
+    from pages.utils.fit_service import prepare_stage, evaluate_stage, forecast_stage
+    close_price = get_data(ticker)
+    rolling_price, differencing_order, scaled_data, scaler = prepare_stage(close_price)
+    rmse = evaluate_stage(scaled_data, differencing_order)
+    forecast = forecast_stage(scaled_data, differencing_order, scaler)
+    return {'rolling_price': rolling_price, 'rmse': rmse, 'forecast': forecast, 'as_of': close_price.index[-1]}
+
+# Simple daily returns from a yf.download-shaped frame
+def _returns(frame):
+    close = frame['Adj Close'] if 'Adj Close' in frame.columns else frame['Close']
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    return close.pct_change()
+
+# Beta/alpha over the default one-year window and the rolling beta, as on the CAPM Beta page
+def capm_metrics(stock_data, market_data):
+    data = pd.concat([_returns(stock_data).rename('Stock Return'),
+                      _returns(market_data).rename('Market Return')], axis=1).dropna()
+    beta, alpha = np.polyfit(data['Market Return'], data['Stock Return'], 1)
+    rolling_beta = data['Stock Return'].rolling(ROLLING_WINDOW).cov(data['Market Return']) / \
+                   data['Market Return'].rolling(ROLLING_WINDOW).var()
+    return {
+        'beta': float(beta),
+        'alpha': float(alpha),
+        'rolling_window': ROLLING_WINDOW,
+        'rolling_beta': rolling_beta.dropna(),
+        'sharpe_inputs': {'mean': float(data['Stock Return'].mean()), 'std': float(data['Stock Return'].std())},
+    }
+
+# Last values of the indicators drawn on the Stock Analysis page
+def indicator_snapshot(history):
+    from pages.utils.plotly_figure import _pandas_ta
+    pta = _pandas_ta()
+    close = history['Close']
+    macd = pta.macd(close)
+    return {
+        'as_of': history.index[-1],
+        'close': float(close.iloc[-1]),
+        'rsi': float(pta.rsi(close).iloc[-1]),
+        'macd': float(macd.iloc[-1, 0]),
+        'macd_signal': float(macd.iloc[-1, 1]),
+        'sma_50': float(pta.sma(close, 50).iloc[-1]),
+        'volatility': float(close.rolling(VOLATILITY_WINDOW).std().iloc[-1]),
+    }
+
+# Refresh prices and precompute every analytic for the watchlist, then publish the run.
+# Returns the run record that is also appended to precomputed/runs.jsonl.
+def run_precompute(watchlist, run_date=None, workers=None):
+    run_date = run_date or datetime.date.today()
+    watchlist = [ticker_key(ticker) for ticker in watchlist]
+    started = time.perf_counter()
+    provider = get_provider()
+    stage_seconds = {}
+    payloads = {ticker: {'schema': SCHEMA_VERSION, 'ticker': ticker, 'run_date': run_date} for ticker in watchlist}
+    failures = {}
+
+    # 1. Prices: full history published to the shared store (TRADING_APP_SHARED_PRICES), resolution pyramid and the one-year window the CAPM pages use
+    stage_start = time.perf_counter()
+    # DateOffset clamps 29 February to the 28th, as the CAPM Beta page's default start does
+    window_start = (pd.Timestamp(run_date) - pd.DateOffset(years=1)).date()
+    window_end = run_date + datetime.timedelta(days=1)
+    market_data = provider.download(MARKET_TICKER, start=window_start, end=window_end)
+    windows = {}
+    for ticker in watchlist:
+        try:
+            history = provider.history(ticker, period='max')
+            publish_history(ticker, history)
+            update_pyramid(ticker, history)
+            windows[ticker] = provider.download(ticker, start=window_start, end=window_end)
+            payloads[ticker]['indicators'] = indicator_snapshot(history)
+        except Exception:
+            failures[ticker] = traceback.format_exc(limit=1)
+    stage_seconds['prices'] = time.perf_counter() - stage_start
+
+    # 2. CAPM betas, alphas and rolling betas
+    stage_start = time.perf_counter()
+    for ticker, stock_data in windows.items():
+        try:
+            capm = capm_metrics(stock_data, market_data)
+            capm.update({'market': MARKET_TICKER, 'start': window_start, 'end': run_date})
+            payloads[ticker]['capm'] = capm
+        except Exception:
+            failures[ticker] = traceback.format_exc(limit=1)
+    stage_seconds['capm'] = time.perf_counter() - stage_start
+
+    # 3. Beta index over the benchmark constituents; only the new trading days are appended
+    stage_start = time.perf_counter()
+    from pages.utils.beta_index import refresh_beta_index
+    try:
+        _, index_failures = refresh_beta_index(provider, market=MARKET_TICKER, today=run_date)
+        for ticker, error in index_failures.items():
+            failures.setdefault(ticker, error)
+    except Exception:
+        failures['beta_index'] = traceback.format_exc(limit=1)
+    stage_seconds['beta_index'] = time.perf_counter() - stage_start
+
+    # 4. Forecasts, fitted in parallel
+    stage_start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {ticker: pool.submit(forecast_ticker, ticker) for ticker in watchlist}
+        for ticker, future in futures.items():
+            try:
+                payloads[ticker]['forecast'] = future.result()
+            except Exception:
+                failures[ticker] = traceback.format_exc(limit=1)
+    stage_seconds['forecast'] = time.perf_counter() - stage_start
+
+    # Publish: write every payload under the run date, then switch the LATEST pointer
+    for ticker, payload in payloads.items():
+        pd.to_pickle(payload, store_path(*VERSION_PARTS, run_date.isoformat(), f'{ticker}.pkl'))
+    latest_tmp = temp_path(store_path(*VERSION_PARTS, 'LATEST'))
+    with open(latest_tmp, 'w') as f:
+        f.write(run_date.isoformat())
+    os.replace(latest_tmp, os.path.join(_version_dir(), 'LATEST'))
+
+    record = {
+        'run_date': run_date.isoformat(),
+        'schema': SCHEMA_VERSION,
+        'tickers': len(watchlist),
+        'failed': sorted(failures),
+        'duration_s': round(time.perf_counter() - started, 3),
+        'stages_s': {stage: round(seconds, 3) for stage, seconds in stage_seconds.items()},
+    }
+    with open(store_path('precomputed', 'runs.jsonl'), 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+# Latest precomputed payload for a ticker, or None so the page computes live
+def load_precomputed(ticker):
+    try:
+        with open(os.path.join(_version_dir(), 'LATEST')) as f:
+            run_date = f.read().strip()
+        payload = pd.read_pickle(os.path.join(_version_dir(), run_date, f'{ticker_key(ticker)}.pkl'))
+    except (OSError, ValueError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+        return None
+    if not isinstance(payload, dict) or payload.get('schema') != SCHEMA_VERSION:
+        return None
+    return payload
+
+# True when no trading day has closed between `as_of` and today, so data up to `as_of` is still current
+def is_current_as_of(as_of, today=None):
+    today = today or datetime.date.today()
+    missed = pd.bdate_range(as_of + datetime.timedelta(days=1), today - datetime.timedelta(days=1))
+    return as_of <= today and len(missed) == 0
+
+# True when no trading day has closed between the run and today, so the run is still current
+def is_current(payload, today=None):
+    return is_current_as_of(payload['run_date'], today)
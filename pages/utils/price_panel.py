@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Compact (dates x tickers) price panel for large universes.
+#
+# Values are float32 in column-major order, so each ticker's series is one
+# contiguous block, with a shared int64 (nanosecond) date index and a
+# ticker -> column dictionary. That is half the memory of a float64 frame and
+# avoids per-column object overhead.
+#
+# Precision: float32 carries 24 bits of mantissa (about 7 significant digits).
+#   - Prices are stored with a relative error of at most 6e-8.
+#   - Daily returns in percent are within about 1e-4 percentage points of float64.
+#   - Betas and correlations are computed in float64 from the float32 inputs and
+#     agree with the float64 results to about 1e-5 (relative).
+# Use float64 frames where results must match to the last digit.
+class PricePanel:
+    def __init__(self, values, dates, tickers):
+        self.values = np.asfortranarray(values, dtype=np.float32)
+        self.dates = np.asarray(dates, dtype=np.int64)
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        if self.values.shape != (len(self.dates), len(self.tickers)):
+            raise ValueError(f"values shape {self.values.shape} does not match "
+                             f"{len(self.dates)} dates x {len(self.tickers)} tickers")
+
+    # Build from a wide price frame, with dates in a 'Date' column (as in CAPM_Return) or in the index.
+    # No copy is made when the frame already holds a single float32 block.
+    @classmethod
+    def from_frame(cls, frame):
+        if 'Date' in frame.columns:
+            dates = pd.DatetimeIndex(frame['Date'])
+            frame = frame.drop(columns='Date')
+        else:
+            dates = pd.DatetimeIndex(frame.index)
+        if dates.tz is not None:
+            dates = dates.tz_convert('UTC').tz_localize(None)
+        return cls(frame.to_numpy(dtype=np.float32), dates.values.astype('datetime64[ns]').view(np.int64), frame.columns)
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self.dates.view('datetime64[ns]'), name='Date')
+
+    # Tickers in column order (mirrors DataFrame.columns)
+    @property
+    def columns(self):
+        return self.tickers
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.dates.nbytes
+
+    def __len__(self):
+        return len(self.dates)
+
+    # One ticker as a Series backed by the panel's memory
+    def __getitem__(self, ticker):
+        return pd.Series(self.values[:, self.ticker_index[ticker]], index=self.index, name=ticker, copy=False)
+
+    # Convert to a pandas frame without copying the values; date_column=True gives the
+    # 'Date' column layout capm_functions.interactive_plot expects (this copies)
+    def to_frame(self, date_column=False):
+        frame = pd.DataFrame(self.values, index=self.index, columns=self.tickers, copy=False)
+        return frame.reset_index() if date_column else frame
+
+    # Correlation matrix of the columns, accumulated in float64
+    def corr(self):
+        return pd.DataFrame(np.corrcoef(self.values, rowvar=False), index=self.tickers, columns=self.tickers)
+
+    def with_values(self, values):
+        return PricePanel(values, self.dates, self.tickers)
+
+# Prices relative to the first row
+def normalize(panel):
+    return panel.with_values(panel.values / panel.values[0])
+
+# Daily returns in percent with the first row set to 0, matching capm_functions.daily_return
+def daily_return(panel):
+    values = panel.values
+    returns = np.empty_like(values)
+    returns[0] = 0
+    np.subtract(values[1:], values[:-1], out=returns[1:])
+    returns[1:] /= values[:-1]
+    returns[1:] *= 100
+    return panel.with_values(returns)
+
+# Slope and intercept of the stock's returns against the market's, fitted in float64
+def calculate_beta(panel, stock, market='SP500'):
+    market_returns = panel.values[:, panel.ticker_index[market]].astype(np.float64)
+    stock_returns = panel.values[:, panel.ticker_index[stock]].astype(np.float64)
+    b, a = np.polyfit(market_returns, stock_returns, 1)
+    return b, a
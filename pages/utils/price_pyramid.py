@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from pages.utils.local_store import save_frame, load_frame, ticker_key
+
+# Resolution levels from finest to coarsest and the pandas rule used to build each one
+LEVELS = {'daily': None, 'weekly': 'W', 'monthly': 'MS'}
+
+# How each OHLCV column is aggregated when bars are merged
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+# Keep only the OHLCV columns of a price history
+def ohlcv_columns(dataframe):
+    return dataframe[[col for col in OHLCV_AGG if col in dataframe.columns]]
+
+# Aggregate daily bars into coarser bars, each labelled with its first trading day
+def resample_ohlcv(dataframe, rule):
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in dataframe.columns}
+    bars = dataframe[list(agg)].copy()
+    bars['Date'] = dataframe.index
+    agg['Date'] = 'first'
+    resampled = bars.resample(rule).agg(agg).dropna(subset=['Close'])
+    resampled = resampled.set_index('Date')
+    resampled.index.name = dataframe.index.name or 'Date'
+    return resampled
+
+# Build every level of the pyramid from a full daily history
+def build_pyramid(dataframe):
+    daily = ohlcv_columns(dataframe)
+    pyramid = {'daily': daily}
+    for level, rule in LEVELS.items():
+        if rule is not None:
+            pyramid[level] = resample_ohlcv(daily, rule)
+    return pyramid
+
+# Load a ticker's pyramid from the local store
+def load_pyramid(ticker):
+    pyramid = {level: load_frame('pyramid', ticker_key(ticker), f'{level}.pkl') for level in LEVELS}
+    if any(frame is None or frame.empty for frame in pyramid.values()):
+        return None
+    return pyramid
+
+# Persist a ticker's pyramid to the local store
+def save_pyramid(ticker, pyramid):
+    for level, frame in pyramid.items():
+        save_frame(frame, 'pyramid', ticker_key(ticker), f'{level}.pkl')
+
+# Bring the stored pyramid up to date with a fresh daily history.
+# Only the last (possibly partial) coarse bar and anything after it is re-aggregated;
+# the whole pyramid is rebuilt when the history was restated (e.g. split adjustments).
+def update_pyramid(ticker, dataframe):
+    daily = ohlcv_columns(dataframe)
+    pyramid = load_pyramid(ticker)
+    if pyramid is None or _history_restated(pyramid['daily'], daily):
+        pyramid = build_pyramid(daily)
+        save_pyramid(ticker, pyramid)
+        return pyramid
+
+    stored = pyramid['daily']
+    # The last stored bar may have been an intraday snapshot, so it is replaced too
+    new_rows = daily[daily.index >= stored.index[-1]]
+    if new_rows.empty or new_rows.equals(stored.iloc[-1:]):
+        return pyramid
+
+    daily = pd.concat([stored[stored.index < new_rows.index[0]], new_rows])
+    pyramid['daily'] = daily
+    for level, rule in LEVELS.items():
+        if rule is None:
+            continue
+        coarse = pyramid[level]
+        cut = coarse.index[-1]
+        tail = resample_ohlcv(daily[daily.index >= cut], rule)
+        pyramid[level] = pd.concat([coarse[coarse.index < cut], tail])
+    save_pyramid(ticker, pyramid)
+    return pyramid
+
+# Detect a history whose overlapping closes no longer match what was stored
+def _history_restated(stored, daily):
+    overlap = stored.index.intersection(daily.index)
+    if len(overlap) == 0:
+        return True
+    # Ignore the last stored bar, which may legitimately change until the session closes
+    overlap = overlap[overlap < stored.index[-1]]
+    if len(overlap) == 0:
+        return False
+    return not np.allclose(stored.loc[overlap, 'Close'], daily.loc[overlap, 'Close'], rtol=1e-6)
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from pages.utils.local_store import STORE_DIR, temp_path, ticker_key
+
+# Price histories published as memory-mapped .npy files. Every Streamlit worker maps the
+# same files read-only, so the OS page cache holds one copy no matter how many workers run.
+# Layout: shared/<TICKER>/<version>/{index.npy, values.npy, meta.json} plus a CURRENT pointer.
+SHARED_DIR = os.path.join(STORE_DIR, 'shared')
+
+# Versions kept on disk besides CURRENT, so readers that mapped an older one keep working
+KEEP_VERSIONS = 2
+
+def _ticker_dir(ticker):
+    return os.path.join(SHARED_DIR, ticker_key(ticker))
+
+# Publish a history for all workers; only one process (the scheduler) should write.
+# Files are written to a new version directory and CURRENT is switched atomically.
+def publish_history(ticker, history):
+    ticker_dir = _ticker_dir(ticker)
+    version = str(time.time_ns())
+    version_dir = os.path.join(ticker_dir, version)
+    os.makedirs(version_dir)
+
+    index = history.index
+    tz = str(index.tz) if index.tz is not None else None
+    if tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    np.save(os.path.join(version_dir, 'index.npy'), index.values.astype('datetime64[ns]').view('int64'))
+    np.save(os.path.join(version_dir, 'values.npy'), np.ascontiguousarray(history.to_numpy(dtype='float64')))
+    with open(os.path.join(version_dir, 'meta.json'), 'w') as f:
+        json.dump({'columns': list(history.columns), 'tz': tz, 'index_name': history.index.name}, f)
+
+    pointer_tmp = temp_path(os.path.join(ticker_dir, 'CURRENT'))
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(ticker_dir, 'CURRENT'))
+    _prune(ticker_dir, version)
+    return version
+
+def _prune(ticker_dir, current):
+    versions = sorted(name for name in os.listdir(ticker_dir) if name.isdigit() and name != current)
+    for version in versions[:-KEEP_VERSIONS]:
+        version_dir = os.path.join(ticker_dir, version)
+        for name in os.listdir(version_dir):
+            os.remove(os.path.join(version_dir, name))
+        os.rmdir(version_dir)
+
+# Mapped frames of this worker, reused until the writer publishes a new version
+_mapped = {}
+_mapped_lock = threading.Lock()
+
+def _current_version(ticker):
+    try:
+        with open(os.path.join(_ticker_dir(ticker), 'CURRENT')) as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+def _map_version(ticker, version):
+    version_dir = os.path.join(_ticker_dir(ticker), version)
+    with open(os.path.join(version_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    values = np.load(os.path.join(version_dir, 'values.npy'), mmap_mode='r')
+    index = pd.DatetimeIndex(np.load(os.path.join(version_dir, 'index.npy')).view('datetime64[ns]'),
+                             name=meta['index_name'])
+    if meta['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    # copy=False keeps the values backed by the read-only mapping
+    return pd.DataFrame(values, index=index, columns=meta['columns'], copy=False)
+
+# History for a ticker from the shared store, or None if it was never published.
+# The returned frame shares the mapped values; adding columns to it does not affect other callers.
+def load_history(ticker):
+    version = _current_version(ticker)
+    if version is None:
+        return None
+    key = ticker_key(ticker)
+    with _mapped_lock:
+        cached = _mapped.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, _map_version(ticker, version))
+            _mapped[key] = cached
+    return cached[1].copy(deep=False)
+
+def _read_kb(line):
+    return int(line.split()[1])
+
+# Memory attributed to the shared store in a process: resident size of the mapped files (rss),
+# this process's proportional share (pss), and what it saves compared with a private copy
+def memory_report(pid='self'):
+    report = {'pid': pid, 'process_rss_kb': 0, 'shared_rss_kb': 0, 'shared_pss_kb': 0}
+    shared_root = os.path.realpath(SHARED_DIR)
+    in_store = False
+    with open(f'/proc/{pid}/smaps') as f:
+        for line in f:
+            fields = line.split()
+            if '-' in fields[0] and ':' not in fields[0]:
+                path = fields[5] if len(fields) > 5 else ''
+                in_store = path.startswith(shared_root)
+            elif fields[0] == 'Rss:':
+                report['process_rss_kb'] += _read_kb(line)
+                if in_store:
+                    report['shared_rss_kb'] += _read_kb(line)
+            elif fields[0] == 'Pss:' and in_store:
+                report['shared_pss_kb'] += _read_kb(line)
+    report['saved_kb'] = report['shared_rss_kb'] - report['shared_pss_kb']
+    return report
+
+# python -m pages.utils.shared_prices publish TSLA AAPL
+# python -m pages.utils.shared_prices report <worker pid> [<worker pid> ...]
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Shared price store')
+    parser.add_argument('command', choices=['publish', 'report'])
+    parser.add_argument('args', nargs='+', help='tickers to publish, or worker pids to report on')
+    args = parser.parse_args()
+    if args.command == 'publish':
+        from pages.utils.data_provider import get_provider
+        provider = get_provider()
+        for ticker in args.args:
+            print(ticker, publish_history(ticker, provider.history(ticker, period='max')))
+    else:
+        total_saved = 0
+        for pid in args.args:
+            report = memory_report(pid)
+            total_saved += report['saved_kb']
+            print(f"pid {pid}: rss {report['process_rss_kb'] / 1024:.1f} MB, shared store rss "
+                  f"{report['shared_rss_kb'] / 1024:.1f} MB, pss {report['shared_pss_kb'] / 1024:.1f} MB, "
+                  f"saved {report['saved_kb'] / 1024:.1f} MB")
+        print(f"total saved across workers: {total_saved / 1024:.1f} MB")
@@ -0,0 +1,112 @@
+import functools
+import json
+import os
+import threading
+import time
+
+# Tracing is switched on with TRADING_APP_TRACE=1; when off, decorated functions are returned unchanged
+ENABLED = os.environ.get('TRADING_APP_TRACE', '') not in ('', '0', 'false', 'False')
+
+# JSON-lines file that every finished span is appended to
+TRACE_LOG = os.environ.get(
+    'TRADING_APP_TRACE_LOG',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '.store', 'traces.jsonl')
+)
+
+# Spans of the current render; Streamlit runs each session's script in its own thread
+_local = threading.local()
+_log_lock = threading.Lock()
+
+def _spans():
+    if not hasattr(_local, 'spans'):
+        _local.spans = []
+        _local.depth = 0
+        _local.page = None
+    return _local.spans
+
+# Time a block of code, or a function when used as a decorator:
+#
+#     with trace('fetch.download'):
+#         ...
+#
+#     @trace('model_train.fit_model')
+#     def fit_model(...):
+class trace:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if ENABLED:
+            _spans()
+            self.depth = _local.depth
+            _local.depth += 1
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if ENABLED:
+            duration = time.perf_counter() - self.start
+            _local.depth -= 1
+            _record({
+                'page': _local.page,
+                'name': self.name,
+                'depth': self.depth,
+                'start': time.time() - duration,
+                'duration_ms': round(duration * 1000, 3),
+                'error': exc_type.__name__ if exc_type else None,
+            })
+        return False
+
+    def __call__(self, func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+# Spans are buffered only during a page render (between start_render and the trace panel).
+# Other threads, such as fit-service, API and download threads, only write to the log, so
+# their buffers never grow.
+def _record(span):
+    if span['page'] is not None:
+        _spans().append(span)
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(TRACE_LOG), exist_ok=True)
+            with open(TRACE_LOG, 'a') as f:
+                f.write(json.dumps(span) + '\n')
+    except OSError:
+        pass
+
+# Reset the span buffer at the top of a page render
+def start_render(page):
+    if ENABLED:
+        _spans().clear()
+        _local.depth = 0
+        _local.page = page
+
+# Show the timing breakdown of the current render in a sidebar expander
+def render_trace_panel():
+    if not ENABLED:
+        return
+    import streamlit as st
+    import pandas as pd
+
+    spans = sorted(_spans(), key=lambda span: span['start'])
+    # The render is over; spans recorded later in this thread are not buffered
+    _spans().clear()
+    _local.page = None
+    with st.sidebar.expander("Performance", expanded=False):
+        if not spans:
+            st.write("No spans recorded for this render.")
+            return
+        timings = pd.DataFrame({
+            'Stage': [' ' * span['depth'] + span['name'] for span in spans],
+            'ms': [span['duration_ms'] for span in spans],
+        })
+        total = sum(span['duration_ms'] for span in spans if span['depth'] == 0)
+        st.write(f"**Traced time:** {total:.0f} ms")
+        st.dataframe(timings, use_container_width=True, hide_index=True)